@@ -1,5 +1,14 @@
-from neori.game import NeoriGame
+import os
 
 def run():
+    # importado só aqui, para quem usa só a simulação não carregar a interface
+    from neori.game import NeoriGame
+
     game = NeoriGame()
+
+    # NEORI_RECORD=partida.nf grava os quadros delta, outro caminho vira uma pasta de PNGs
+    record = os.environ.get('NEORI_RECORD')
+    if record:
+        game.record(record)
+
     game.loop()
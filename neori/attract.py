@@ -0,0 +1,212 @@
+import os
+import zlib
+import hashlib
+import struct
+import threading
+import numpy as np
+
+from typing import Dict, List, Optional
+from neori.stream import COUNT, FrameDecoder, FrameEncoder
+
+# assinatura, versão, quantidade de quadros, início da repetição e
+# quadros de transição no fim
+LOOP = struct.Struct('<2sBIII')
+MAGIC = b'NA'
+VERSION = 2
+
+class AttractLoop:
+    """
+    O fundo do menu gravado uma vez e repetido. Enquanto grava, as gerações
+    vindas da simulação são guardadas até uma delas:
+
+    - repetir uma geração de pelo menos `min_loop` quadros antes (um ciclo);
+    - repetir, por `min_loop` quadros seguidos, um ciclo mais curto (o mundo
+      estabilizou, como uma forma parada ou um oscilador);
+    - chegar a `max_frames`, quando a volta é feita entre os dois quadros
+      mais parecidos do fim e do começo, com uma transição de `fade`
+      quadros em que as células passam aos poucos para o começo do ciclo.
+
+    A codificação em deltas comprimidos roda numa thread, enquanto isso o
+    menu continua com a simulação. O resultado fica em disco para as
+    próximas execuções.
+    """
+    path       : str
+    max_frames : int
+    min_loop   : int
+    fade       : int
+    frames     : List[bytes]
+    start      : int
+    blend      : int
+    index      : int
+    decoder    : FrameDecoder
+    lead       : List[np.ndarray]
+    dissolve   : Optional[np.ndarray]
+    grids      : List[np.ndarray]
+    seen       : Dict[bytes, int]
+    period     : int
+    repeats    : int
+    closing    : Optional[threading.Thread]
+
+    def __init__(self, path: str, max_frames=900, min_loop=150, fade=30) -> None:
+        self.path = path
+        self.max_frames = max_frames
+        self.min_loop = min_loop
+        self.fade = fade
+        self.frames = []
+        self.start = 0
+        self.blend = 0
+        self.index = 0
+        self.decoder = FrameDecoder()
+        self.lead = []
+        self.dissolve = None
+        self.grids = []
+        self.seen = {}
+        self.period = 0
+        self.repeats = 0
+        self.closing = None
+        self.load()
+
+    @property
+    def ready(self) -> bool:
+        return len(self.frames) > 0
+
+    def record(self, grid: np.ndarray) -> bool:
+        """Guarda mais uma geração, retorna `True` quando o ciclo estiver pronto."""
+        if self.ready or self.closing is not None:
+            return self.ready
+
+        grid = grid.astype(np.uint8)
+        key = hashlib.blake2b(grid.tobytes(), digest_size=16).digest()
+        count = len(self.grids)
+        last = self.seen.get(key)
+        period = 0 if last is None else count - last
+
+        # um ciclo curto só conta se durar, os eventos da simulação
+        # ainda podem tirar o mundo dele
+        if 0 < period < self.min_loop:
+            self.repeats = self.repeats + 1 if period == self.period else 1
+        else:
+            self.repeats = 0
+        self.period = period
+
+        if period >= self.min_loop:
+            self.close_async(last, count, 0)
+        elif self.repeats >= self.min_loop:
+            self.close_async(count - period, count, 0)
+        else:
+            self.seen[key] = count
+            self.grids.append(grid)
+            if len(self.grids) >= self.max_frames:
+                self.close_async(None, len(self.grids), self.fade)
+
+        return self.ready
+
+    def restart(self):
+        """
+        Descarta a gravação em andamento, quando o menu volta com um mundo
+        novo as gerações já guardadas não continuam nele.
+        """
+        if self.ready or self.closing is not None:
+            return
+        self.grids = []
+        self.seen = {}
+        self.period = 0
+        self.repeats = 0
+
+    def close_async(self, start: int, end: int, blend: int):
+        self.closing = threading.Thread(target=self.close, args=(start, end, blend), daemon=True)
+        self.closing.start()
+
+    def seam(self, end: int):
+        # entre os últimos quadros e os do começo, o par mais parecido:
+        # depois do quadro `last` a repetição segue do sucessor do outro
+        grids = np.stack(self.grids[:end]).reshape(end, -1)
+        best, pair = None, (self.fade, end)
+        for last in range(end - self.min_loop // 2, end):
+            heads = grids[self.fade : last - self.min_loop]
+            if len(heads) == 0:
+                continue
+            diff = np.count_nonzero(heads != grids[last], axis=1)
+            if best is None or diff.min() < best:
+                best, pair = diff.min(), (self.fade + int(diff.argmin()) + 1, last + 1)
+        return pair
+
+    def close(self, start: Optional[int], end: int, blend: int):
+        """
+        Codifica as gerações `[0, end)`, repetidas a partir de `start`. Sem
+        `start`, a volta é procurada entre os quadros mais parecidos.
+        """
+        if start is None:
+            start, end = self.seam(end)
+
+        encoder = FrameEncoder(interval=end + 1)
+        frames = [encoder.encode_frame(grid, [], []) for grid in self.grids[:end]]
+
+        self.start = start
+        self.blend = blend
+        self.index = 0
+        self.grids = []
+        self.seen = {}
+        self.save(frames)
+
+        # a partir daqui o menu passa a repetir a gravação
+        self.frames = frames
+
+    def next(self) -> np.ndarray:
+        end = len(self.frames)
+        if self.index == end:
+            # a transição terminou no quadro antes de `start`
+            self.decoder.curr = self.lead[-1].copy()
+            self.index = self.start + 1
+            return self.decoder.curr
+
+        i = self.index
+        self.decoder.decode(self.frames[i])
+        self.index += 1
+        grid = self.decoder.curr
+
+        # os quadros que levam até `start` são guardados na primeira passada
+        if self.start - self.blend <= i <= self.start and len(self.lead) <= self.blend:
+            self.lead.append(grid.copy())
+
+        k = i - (end - self.blend)
+        if k >= 0:
+            if self.dissolve is None:
+                self.dissolve = np.random.default_rng(0).random(grid.shape)
+            return np.where(self.dissolve < (k + 1) / (self.blend + 1), self.lead[k], grid)
+        return grid
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as source:
+                data = zlib.decompress(source.read())
+            magic, version, count, start, blend = LOOP.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                return
+            offset = LOOP.size
+            frames = []
+            for _ in range(count):
+                size, = COUNT.unpack_from(data, offset)
+                offset += COUNT.size
+                frames.append(data[offset : offset+size])
+                offset += size
+        except (OSError, struct.error, zlib.error):
+            return
+
+        self.start = start
+        self.blend = blend
+        self.frames = frames
+
+    def save(self, frames: List[bytes]):
+        chunks = [LOOP.pack(MAGIC, VERSION, len(frames), self.start, self.blend)]
+        for frame in frames:
+            chunks.append(COUNT.pack(len(frame)))
+            chunks.append(frame)
+
+        # escreve ao lado e troca, o jogo pode fechar no meio da gravação
+        try:
+            with open(self.path + '.tmp', 'wb') as output:
+                output.write(zlib.compress(b''.join(chunks)))
+            os.replace(self.path + '.tmp', self.path)
+        except OSError:
+            pass
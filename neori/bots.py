@@ -0,0 +1,133 @@
+import numpy as np
+
+from typing import List, Optional
+from neori.snake import Snake
+from neori.utils import Vec2i
+from neori.world import Cell
+
+INF = np.iinfo(np.int32).max // 2
+
+# mesma ordem das camadas retornadas por `neighbors`
+DIRECTIONS: List[Vec2i] = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+def neighbors(grid: np.ndarray, fill) -> np.ndarray:
+    """Para cada direção, uma camada com o valor da vizinha naquela direção."""
+    layers = np.full((4, *grid.shape), fill, dtype=grid.dtype)
+    layers[0, :-1] = grid[1:]
+    layers[1, 1:] = grid[:-1]
+    layers[2, :, :-1] = grid[:, 1:]
+    layers[3, :, 1:] = grid[:, :-1]
+    return layers
+
+class FlowField:
+    """
+    Distância de cada célula até o alvo mais próximo (BFS com várias
+    origens), compartilhada por todos os bots. Quando alvos ou obstáculos
+    mudam, só a região afetada é refeita, e a direção de cada célula fica
+    pronta para consulta.
+    """
+    cols      : int
+    rows      : int
+    dist      : np.ndarray
+    flow      : np.ndarray
+    targets   : np.ndarray
+    obstacles : np.ndarray
+
+    def __init__(self, cols: int, rows: int) -> None:
+        self.cols = cols
+        self.rows = rows
+        self.reset()
+
+    def reset(self):
+        shape = (self.cols, self.rows)
+        self.dist = np.full(shape, INF, dtype=np.int32)
+        self.flow = np.full(shape, -1, dtype=np.int8)
+        self.targets = np.zeros(shape, dtype=bool)
+        self.obstacles = np.zeros(shape, dtype=bool)
+
+    def update(self, targets: np.ndarray, obstacles: np.ndarray):
+        lost = (self.targets & ~targets) | (obstacles & ~self.obstacles)
+        gained = (targets & ~self.targets) | (self.obstacles & ~obstacles)
+        self.targets = targets
+        self.obstacles = obstacles
+
+        if not lost.any() and not gained.any():
+            return
+
+        dist = self.dist
+        if lost.any():
+            dist[self.invalidated(lost)] = INF
+
+        dist[obstacles] = INF
+        dist[targets & ~obstacles] = 0
+        self.relax()
+        self.update_flow()
+
+    def invalidated(self, lost: np.ndarray) -> np.ndarray:
+        # segue as distâncias crescentes a partir das células perdidas,
+        # tudo que pode ter dependido delas volta a ser desconhecido
+        dist = self.dist
+        affected = lost.copy()
+        frontier = lost
+        while frontier.any():
+            sources = neighbors(np.where(frontier, dist, -2), -2)
+            grown = (sources + 1 == dist).any(axis=0)
+            grown &= ~affected & (dist < INF)
+            affected |= grown
+            frontier = grown
+
+            # se quase tudo foi afetado, refazer do zero sai mais barato
+            if np.count_nonzero(affected) > affected.size // 2:
+                affected[...] = True
+                break
+        return affected
+
+    def relax(self):
+        dist = self.dist
+        free = ~self.obstacles
+        while True:
+            candidate = neighbors(dist, INF).min(axis=0) + 1
+            better = (candidate < dist) & free
+            if not better.any():
+                break
+            dist[better] = candidate[better]
+
+    def update_flow(self):
+        layers = neighbors(self.dist, INF)
+        self.flow = layers.argmin(axis=0).astype(np.int8)
+        self.flow[layers.min(axis=0) >= INF] = -1
+
+    def direction(self, cell: Vec2i) -> Optional[Vec2i]:
+        i, j = cell
+        if not (0 <= i < self.cols and 0 <= j < self.rows):
+            return None
+        k = self.flow[i, j]
+        return None if k < 0 else DIRECTIONS[k]
+
+    def track(self, state, snakes: List[Snake] = None):
+        """Atualiza o campo com as frutas, a infecção e os corpos das cobras."""
+        world = state.world
+        targets = world.curr == Cell.Infected
+        for food in state.foods:
+            targets[food.pos] = True
+
+        obstacles = np.zeros(targets.shape, dtype=bool)
+        for snake in [state.snake] if snakes is None else snakes:
+            for i, j in snake.body:
+                if 0 <= i < self.cols and 0 <= j < self.rows:
+                    obstacles[i, j] = True
+
+        self.update(targets, obstacles)
+
+class Bot:
+    snake : Snake
+    field : FlowField
+
+    def __init__(self, snake: Snake, field: FlowField) -> None:
+        self.snake = snake
+        self.field = field
+
+    def steer(self):
+        new_dir = self.field.direction(self.snake.head)
+        if new_dir is not None:
+            self.snake.change_dir(new_dir)
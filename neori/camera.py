@@ -0,0 +1,108 @@
+import numpy as np
+
+from typing import Optional
+from pygame import Rect
+from neori import colors
+from neori.utils import Vec2i, clamp
+from neori.world import Cell, WorldGrid
+
+# cor de cada estado de célula, as células mortas ficam transparentes
+PALETTE = np.array([
+    colors.BLACK[:3],
+    colors.CELL[:3],
+    colors.INFECTED[:3],
+    colors.IMMUNE[:3],
+    colors.SPAWN[:3],
+    colors.IMMUNE[:3],
+], dtype=np.uint8)
+
+def dominant(cells: np.ndarray, n: int) -> np.ndarray:
+    """
+    Reduz cada bloco NxN ao estado vivo mais frequente nele,
+    o bloco só fica morto se todas as suas células estiverem mortas.
+    """
+    cells = np.pad(cells, ((0, -cells.shape[0] % n), (0, -cells.shape[1] % n)))
+    cols, rows = cells.shape[0] // n, cells.shape[1] // n
+    blocks = cells.reshape(cols, n, rows, n)
+
+    counts = np.stack([(blocks == kind).sum(axis=(1, 3)) for kind in Cell])
+    counts[Cell.Dead] = 0
+    return counts.argmax(axis=0)
+
+class Camera:
+    world  : WorldGrid
+    res    : int
+    zoom   : int
+    detail : int
+    col    : int
+    row    : int
+    width  : int
+    height : int
+
+    max_zoom = 4
+
+    def __init__(self, world: WorldGrid, width: int, height: int, zoom=1) -> None:
+        self.world = world
+        self.res = world.res
+        self.width = width // self.res
+        self.height = height // self.res
+        self.zoom = zoom
+        self.detail = 1
+        self.col = 0
+        self.row = 0
+
+    @property
+    def cols(self) -> int:
+        return self.width * self.zoom
+
+    @property
+    def rows(self) -> int:
+        return self.height * self.zoom
+
+    @property
+    def scale(self) -> int:
+        # pixels por célula retornada por `view`
+        return self.res * self.detail
+
+    @property
+    def size(self) -> Vec2i:
+        return self.width * self.res, self.height * self.res
+
+    @property
+    def fit_zoom(self) -> int:
+        # o menor zoom em que o mundo inteiro aparece
+        return max(-(-self.world.cols // self.width), -(-self.world.rows // self.height), 1)
+
+    @property
+    def offset(self) -> Vec2i:
+        # quando o mundo é menor que a tela, a imagem fica centralizada
+        width = -(-min(self.cols, self.world.cols) // self.zoom) * self.res
+        height = -(-min(self.rows, self.world.rows) // self.zoom) * self.res
+        return (self.width * self.res - width) // 2, (self.height * self.res - height) // 2
+
+    def set_zoom(self, zoom: int):
+        self.zoom = clamp(zoom, 1, min(self.max_zoom, self.fit_zoom))
+
+    def follow(self, cell: Vec2i):
+        i, j = cell
+        col = clamp(i - self.cols // 2, 0, max(0, self.world.cols - self.cols))
+        row = clamp(j - self.rows // 2, 0, max(0, self.world.rows - self.rows))
+
+        # alinha aos blocos para o nível de detalhe não tremer
+        block = self.zoom * self.detail
+        self.col = col - col % block
+        self.row = row - row % block
+
+    def view(self, grid: np.ndarray) -> np.ndarray:
+        cells = grid[self.col : self.col + self.cols, self.row : self.row + self.rows]
+        if self.zoom * self.detail > 1:
+            cells = dominant(cells, self.zoom * self.detail)
+        return cells
+
+    def rect(self, i: int, j: int) -> Optional[Rect]:
+        x = (i - self.col) // self.zoom
+        y = (j - self.row) // self.zoom
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        ox, oy = self.offset
+        return Rect(ox + x * self.res, oy + y * self.res, self.res, self.res)
@@ -0,0 +1,144 @@
+import os
+import queue
+import threading
+import numpy as np
+import pygame
+
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from neori import colors
+from neori.camera import PALETTE
+from neori.food import Fruit, FruitColor
+from neori.stream import COUNT, FoodInfo, FrameDecoder, FrameEncoder
+from neori.utils import Vec2i
+
+# tick, células, corpo da cobra e frutas
+Snapshot = Tuple[int, np.ndarray, List[Vec2i], List[FoodInfo]]
+
+class Recorder:
+    """
+    Grava a partida sem travar o jogo. A cada tick só o estado é copiado
+    para uma fila limitada, e uma thread codifica os quadros: num arquivo
+    de quadros delta (`.nf`, o mesmo formato de `stream.py`) ou numa
+    sequência de PNGs dentro de uma pasta. Se a codificação atrasar, os
+    quadros novos são descartados e contados em vez de esperar. Um erro
+    na thread encerra a gravação e fica em `error`, o jogo continua.
+    """
+    path          : str
+    format        : str
+    scale         : int
+    queue         : queue.Queue
+    thread        : threading.Thread
+    output        : Optional[BinaryIO]
+    error         : Optional[Exception]
+    tick          : int
+    frames        : int
+    dropped       : int
+    bytes_written : int
+
+    def __init__(self, path: str, size=64, scale=4) -> None:
+        self.path = path
+        self.format = 'raw' if path.endswith('.nf') else 'png'
+        self.scale = scale
+        self.queue = queue.Queue(maxsize=size)
+        self.thread = threading.Thread(target=self.run, name='neori-recorder', daemon=True)
+        self.tick = 0
+        self.frames = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.output = None
+        self.error = None
+
+        # um caminho inválido falha aqui, e não depois na thread
+        if self.format == 'raw':
+            self.output = open(path, 'wb')
+        else:
+            os.makedirs(path, exist_ok=True)
+        self.thread.start()
+
+    def capture(self, state):
+        snapshot = (
+            self.tick,
+            state.world.curr.astype(np.uint8),
+            list(state.snake.body),
+            [(*food.pos, int(food.type)) for food in state.foods],
+        )
+        self.tick += 1
+
+        if self.error is not None:
+            self.dropped += 1
+            return
+
+        try:
+            self.queue.put_nowait(snapshot)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        # espera a fila esvaziar, os quadros já capturados não se perdem;
+        # se a thread morreu ninguém mais vai tirar nada da fila
+        while self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.thread.join()
+
+    def report(self) -> str:
+        report = f'{self.frames} quadros gravados em {self.path}, {self.dropped} descartados'
+        if self.error is not None:
+            report += f', falhou: {self.error}'
+        return report
+
+    def run(self):
+        try:
+            if self.format == 'raw':
+                self.write_frames()
+            else:
+                self.save_images()
+        except Exception as error:
+            self.error = error
+        finally:
+            if self.output is not None:
+                self.output.close()
+
+    def write_frames(self):
+        encoder = FrameEncoder()
+        for snapshot in iter(self.queue.get, None):
+            _, grid, body, foods = snapshot
+            data = encoder.encode_frame(grid, body, foods)
+            self.output.write(COUNT.pack(len(data)) + data)
+            self.bytes_written += COUNT.size + len(data)
+            self.frames += 1
+
+    def save_images(self):
+        for snapshot in iter(self.queue.get, None):
+            tick, grid, body, foods = snapshot
+            filename = os.path.join(self.path, f'{tick:06d}.png')
+            pygame.image.save(self.draw(grid, body, foods), filename)
+            self.frames += 1
+
+    def draw(self, grid: np.ndarray, body: List[Vec2i], foods: List[FoodInfo]) -> pygame.Surface:
+        pixels = PALETTE[grid]
+        cols, rows = grid.shape
+
+        for col, row, kind in foods:
+            pixels[col, row] = FruitColor[Fruit(kind)][:3]
+        for col, row in body:
+            if 0 <= col < cols and 0 <= row < rows:
+                pixels[col, row] = colors.SNAKE[:3]
+
+        pixels = pixels.repeat(self.scale, axis=0).repeat(self.scale, axis=1)
+        return pygame.surfarray.make_surface(pixels)
+
+def read_frames(path: str) -> Iterator[FrameDecoder]:
+    """Reproduz um arquivo `.nf`, devolvendo o decodificador a cada quadro."""
+    decoder = FrameDecoder()
+    with open(path, 'rb') as source:
+        while True:
+            header = source.read(COUNT.size)
+            if len(header) < COUNT.size:
+                break
+            size, = COUNT.unpack(header)
+            decoder.decode(source.read(size))
+            yield decoder
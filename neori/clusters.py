@@ -0,0 +1,186 @@
+import numpy as np
+
+from typing import Optional
+from neori.utils import Vec2i
+from neori.world import Cell, WorldGrid
+
+NONE = -1
+BIG = np.iinfo(np.int32).max
+
+# um componente de um bloco, ou um foco inteiro depois da junção
+PART = np.dtype([
+    ('label', '<i4'), ('tile', '<i4'), ('size', '<i4'),
+    ('sum_col', '<i8'), ('sum_row', '<i8'),
+    ('min_col', '<i4'), ('min_row', '<i4'), ('max_col', '<i4'), ('max_row', '<i4'),
+])
+
+CLUSTER = np.dtype([
+    ('size', '<i4'), ('col', '<f4'), ('row', '<f4'),
+    ('min_col', '<i4'), ('min_row', '<i4'), ('max_col', '<i4'), ('max_row', '<i4'),
+])
+
+class ClusterMap:
+    """
+    Focos de infecção (componentes conexos das células infectadas) com
+    tamanho, centro e retângulo envolvente. O mundo é dividido em blocos
+    e só os blocos que mudaram desde o último tick são rotulados de novo;
+    os focos saem da junção dos componentes de cada bloco pelas fronteiras.
+    """
+    world    : WorldGrid
+    tile     : int
+    shape    : Vec2i
+    mask     : np.ndarray
+    labels   : np.ndarray
+    parts    : np.ndarray
+    owner    : np.ndarray
+    clusters : np.ndarray
+
+    def __init__(self, world: WorldGrid, tile=16) -> None:
+        self.world = world
+        self.tile = tile
+        self.reset()
+
+    def reset(self):
+        t = self.tile
+        self.shape = (-(-self.world.cols // t) * t, -(-self.world.rows // t) * t)
+        self.mask = np.zeros(self.shape, dtype=bool)
+        self.labels = np.full(self.shape, NONE, dtype=np.int32)
+        self.parts = np.zeros(0, dtype=PART)
+        self.owner = np.zeros(0, dtype=np.int32)
+        self.clusters = np.zeros(0, dtype=CLUSTER)
+
+    def blocks(self, grid: np.ndarray) -> np.ndarray:
+        # (blocos em x, blocos em y, t, t), uma view da grade
+        t = self.tile
+        cols, rows = self.shape
+        return grid.reshape(cols // t, t, rows // t, t).swapaxes(1, 2)
+
+    def update(self):
+        world = self.world
+        infected = np.zeros(self.shape, dtype=bool)
+        infected[:world.cols, :world.rows] = world.curr == Cell.Infected
+
+        dirty = np.argwhere(self.blocks(infected != self.mask).any(axis=(2, 3)))
+        if len(dirty) == 0:
+            return
+
+        self.mask = infected
+        self.label_tiles(dirty)
+        self.merge()
+
+    def label_tiles(self, dirty: np.ndarray):
+        t = self.tile
+        cols, rows = self.shape
+        a, b = dirty[:, 0], dirty[:, 1]
+
+        # cada célula começa com o próprio índice e fica com o menor
+        # índice alcançável dentro do bloco, que identifica o componente
+        cells = self.blocks(self.mask)[a, b]
+        index = self.blocks(np.arange(cols * rows, dtype=np.int32).reshape(self.shape))[a, b]
+        label = np.where(cells, index, BIG)
+        while True:
+            low = label.copy()
+            np.minimum(low[:, 1:], label[:, :-1], out=low[:, 1:])
+            np.minimum(low[:, :-1], label[:, 1:], out=low[:, :-1])
+            np.minimum(low[:, :, 1:], label[:, :, :-1], out=low[:, :, 1:])
+            np.minimum(low[:, :, :-1], label[:, :, 1:], out=low[:, :, :-1])
+            low[~cells] = BIG
+            if np.array_equal(low, label):
+                break
+            label = low
+
+        self.blocks(self.labels)[a, b] = np.where(cells, label, NONE)
+
+        # estatísticas dos componentes dos blocos refeitos
+        found = label[cells]
+        col, row = np.divmod(index[cells], rows)
+        unique, inverse = np.unique(found, return_inverse=True)
+
+        parts = np.zeros(len(unique), dtype=PART)
+        parts['label'] = unique
+        parts['tile'] = (unique // rows // t) * (rows // t) + unique % rows // t
+        parts['size'] = np.bincount(inverse)
+        parts['sum_col'] = np.bincount(inverse, weights=col)
+        parts['sum_row'] = np.bincount(inverse, weights=row)
+        parts['min_col'] = parts['min_row'] = BIG
+        np.minimum.at(parts['min_col'], inverse, col)
+        np.minimum.at(parts['min_row'], inverse, row)
+        np.maximum.at(parts['max_col'], inverse, col)
+        np.maximum.at(parts['max_row'], inverse, row)
+
+        tiles = a * (rows // t) + b
+        kept = self.parts[~np.isin(self.parts['tile'], tiles)]
+        self.parts = np.concatenate((kept, parts))
+        self.parts.sort(order='label')
+
+    def merge(self):
+        t = self.tile
+        labels = self.labels
+        parts = self.parts
+
+        # pares de componentes vizinhos através das fronteiras dos blocos
+        pairs = [
+            (labels[t-1:-1:t].ravel(), labels[t::t].ravel()),
+            (labels[:, t-1:-1:t].ravel(), labels[:, t::t].ravel()),
+        ]
+        left = np.concatenate([p for p, _ in pairs])
+        right = np.concatenate([q for _, q in pairs])
+        touching = (left != NONE) & (right != NONE)
+        left = np.searchsorted(parts['label'], left[touching])
+        right = np.searchsorted(parts['label'], right[touching])
+
+        # união dos componentes pelo menor índice, com salto de ponteiros
+        parent = np.arange(len(parts))
+        while True:
+            low = np.minimum(parent[left], parent[right])
+            joined = parent.copy()
+            np.minimum.at(joined, left, low)
+            np.minimum.at(joined, right, low)
+            joined = joined[joined]
+            if np.array_equal(joined, parent):
+                break
+            parent = joined
+
+        roots, inverse = np.unique(parent, return_inverse=True)
+        size = np.bincount(inverse, weights=parts['size'], minlength=len(roots))
+        clusters = np.zeros(len(roots), dtype=CLUSTER)
+        clusters['size'] = size
+        clusters['col'] = np.bincount(inverse, weights=parts['sum_col'], minlength=len(roots)) / np.maximum(size, 1)
+        clusters['row'] = np.bincount(inverse, weights=parts['sum_row'], minlength=len(roots)) / np.maximum(size, 1)
+        clusters['min_col'] = clusters['min_row'] = BIG
+        np.minimum.at(clusters['min_col'], inverse, parts['min_col'])
+        np.minimum.at(clusters['min_row'], inverse, parts['min_row'])
+        np.maximum.at(clusters['max_col'], inverse, parts['max_col'])
+        np.maximum.at(clusters['max_row'], inverse, parts['max_row'])
+
+        # os focos ficam do maior para o menor
+        order = np.argsort(-clusters['size'], kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        self.clusters = clusters[order]
+        self.owner = rank[inverse].astype(np.int32)
+
+    @property
+    def count(self) -> int:
+        return len(self.clusters)
+
+    @property
+    def largest(self) -> Optional[np.void]:
+        return self.clusters[0] if len(self.clusters) > 0 else None
+
+    def cluster_at(self, i: int, j: int) -> int:
+        """Índice em `clusters` do foco que contém a célula, ou -1."""
+        label = self.labels[i, j]
+        if label == NONE:
+            return NONE
+        return int(self.owner[np.searchsorted(self.parts['label'], label)])
+
+    def distance(self, i: int, j: int) -> float:
+        """Distância até o retângulo do foco mais próximo."""
+        if len(self.clusters) == 0:
+            return float('inf')
+
+        c = self.clusters
+        di = np.maximum(0, np.maximum(c['min_col'] - i, i - c['max_col']))
+        dj = np.maximum(0, np.maximum(c['min_row'] - j, j - c['max_row']))
+        return float(np.sqrt(di*di + dj*dj).min())
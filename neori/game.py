@@ -1,22 +1,26 @@
 import os
-import math
-import random
+import time
+import hashlib
 import pygame
 import pygame_gui as gui
 
 from pygame_gui import UIManager
 
-from typing import List
+from typing import Callable, Dict, List
+from functools import cached_property
 from pygame import Surface, Rect, Color
 from pygame.time import Clock
 
 from neori import colors
-from neori.food import Food, Fruit
-from neori.snake import Snake
-from neori.utils import Vec2i, clamp
-from neori.utils import Timer
-from neori.world import Cell
-from neori.world import WorldGrid
+from neori.attract import AttractLoop
+from neori.camera import Camera, PALETTE
+from neori.capture import Recorder
+from neori.governor import Governor
+from neori.stream import FrameStream
+from neori.snake import TurnQueue
+from neori.utils import Timer, cache_path
+from neori.simulation import GameState, GameEvents
+from neori.simulation import Simulation, Tuning
 from neori.interface import GameInterface, GuidInterface, MainMenu
 from neori.interface import PauseMenu
 from neori.interface import GameOverScreen
@@ -25,52 +29,28 @@ DIRNAME = os.path.dirname(os.path.realpath(__file__))
 RESOURCES = os.path.join(DIRNAME, "resources")
 THEME_FILE = os.path.join(RESOURCES, "theme.json")
 
-class GameState:
-    snake      : Snake
-    world      : WorldGrid
-    score      : int
-    foods      : List[Food]
-    infections : int
-    is_paused  : bool
-    is_running : bool
-    is_frozen  : bool
-    game_over  : bool
-    charge     : float
-    explosion  : Vec2i
-    spawns     : List[Vec2i]
-    info       : str
-
-    def __init__(self, width, height, res) -> None:
-        self.world = WorldGrid(width, height, res)
-        self.snake = Snake(*self.world.rand_cell())
-        self.score = 0
-        self.foods = []
-        self.charge = 0.0
-        self.infections = 0
-        self.is_frozen = False
-        self.is_paused = False
-        self.is_running = True
-        self.game_over = False
-        self.explosion = None
-        self.info = ''
-        self.spawns = []
-
-class GameEvents:
-    food     : Timer = Timer()
-    flames   : Timer = Timer()
-    infection: Timer = Timer()
-    frozen   : Timer = Timer()
-
+# NEORI_STATS=1 mostra as métricas de desempenho ao sair do jogo
+SHOW_STATS = bool(os.environ.get('NEORI_STATS'))
 
 class NeoriGame:
-    state      : GameState
-    events     : GameEvents
+    sim        : Simulation
     clock      : Clock
     timer      : Timer
     screen     : Surface
     canvas     : Surface
     screen_bg  : Surface
+    camera     : Camera
+    governor   : Governor
+    stream     : FrameStream
+    recorder   : Recorder
+    turns      : TurnQueue
+    latency    : Dict[str, float]
+    lag        : float
     frametime  : float
+    first_frame: float
+    started    : float
+    warmup     : List[Callable]
+    actions    : Dict[object, Callable]
     # interface
     ui_manager : UIManager
     interface  : GameInterface
@@ -78,13 +58,27 @@ class NeoriGame:
     pause_menu : PauseMenu
     ui_gameover: GameOverScreen
     guide_ui   : GuidInterface
+    attract    : AttractLoop
 
     framerate   = 15
+    max_ticks   = 3
     resolution  = 15
     screen_size = (1280, 720)
     canvas_size = (1280, 680)
+    world_size  = canvas_size
+    tuning      = Tuning()
 
     def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.first_frame = 0.0
+        self.actions = {}
+        self.lag = 0.0
+        self.governor = Governor(self.framerate)
+        self.stream = None
+        self.recorder = None
+        self.turns = TurnQueue()
+        self.latency = {'turns': 0, 'total': 0.0, 'worst': 0.0}
+
         pygame.init()
         pygame.display.set_caption("Neori")
 
@@ -92,51 +86,162 @@ class NeoriGame:
         self.clock = Clock()
         self.screen = pygame.display.set_mode(self.screen_size)
         self.screen_bg = Surface(self.screen.get_size())
-        self.events = GameEvents()
-        self.state = GameState(*self.canvas_size, 15)
         self.ui_manager = UIManager(self.screen.get_size(), THEME_FILE, enable_live_theme_updates=False)
 
         self.ui_manager.add_font_paths('silkscreen',
             bold_path=os.path.join(RESOURCES, 'fonts/Silkscreen-Bold.ttf'),
             regular_path=os.path.join(RESOURCES, 'fonts/Silkscreen-Regular.ttf'))
 
+        # trabalho adiado para depois do primeiro quadro, um item por quadro
+        self.warmup = [
+            self.preload_fonts,
+            lambda: self.interface,
+            lambda: self.pause_menu,
+            lambda: self.ui_gameover,
+            lambda: self.guide_ui,
+        ]
+
+        self.screen_bg.fill(colors.BLACK)
+        self.goto_main_menu()
+
+    @cached_property
+    def main_menu(self) -> MainMenu:
+        menu = MainMenu(self.ui_manager)
+        self.actions[menu.play] = self.start_game
+        self.actions[menu.help] = self.show_guide
+        self.actions[menu.quit] = self.quit
+        return menu
+
+    @cached_property
+    def pause_menu(self) -> PauseMenu:
+        menu = PauseMenu(self.ui_manager)
+        menu.close()
+        self.actions[menu.play] = self.resume_game
+        self.actions[menu.help] = self.show_guide
+        self.actions[menu.menu] = self.leave_game
+        self.actions[menu.quit] = self.quit
+        return menu
+
+    @cached_property
+    def ui_gameover(self) -> GameOverScreen:
+        return GameOverScreen(self.ui_manager)
+
+    @cached_property
+    def interface(self) -> GameInterface:
+        return GameInterface(self.ui_manager)
+
+    @cached_property
+    def guide_ui(self) -> GuidInterface:
+        guide = GuidInterface(self.ui_manager)
+        self.actions[guide.close] = guide.panel.hide
+        return guide
+
+    @cached_property
+    def attract(self) -> AttractLoop:
+        # o fundo gravado só vale para o mesmo tamanho de mundo e ajustes
+        world = self.state.world
+        key = hashlib.sha1(repr(self.tuning).encode()).hexdigest()[:12]
+        return AttractLoop(cache_path(f'attract-{world.cols}x{world.rows}-{key}.nf'))
+
+    @property
+    def state(self) -> GameState:
+        return self.sim.state
+
+    @property
+    def events(self) -> GameEvents:
+        return self.sim.events
+
+    def is_built(self, screen: str) -> bool:
+        return screen in self.__dict__
+
+    def preload_fonts(self):
         self.ui_manager.preload_fonts([
             {'name': 'silkscreen', 'point_size': 24, 'style': 'regular', 'antialiased': '1'},
             {'name': 'silkscreen', 'point_size': 14, 'style': 'regular', 'antialiased': '1'},
         ])
 
-        self.main_menu = MainMenu(self.ui_manager)
-        self.pause_menu = PauseMenu(self.ui_manager)
-        self.ui_gameover = GameOverScreen(self.ui_manager)
-        self.interface = GameInterface(self.ui_manager)
-        self.pause_menu.close()
-
-        self.screen_bg.fill(colors.BLACK)
-        self.goto_main_menu()
-        self.guide_ui = GuidInterface(self.ui_manager)
-
     def loop(self):
-        while self.state.is_running:
-            self.frametime = self.clock.tick(self.framerate)/1000.0
+        step = 1.0 / self.framerate
 
-            if not self.state.is_paused:
-                self.timer.update(self.frametime)
+        while self.state.is_running:
+            if self.first_frame > 0 and len(self.warmup) > 0:
+                self.warmup.pop(0)()
 
+            elapsed = self.clock.tick(self.framerate)/1000.0
+            self.frametime = step
+            self.lag += elapsed
             self.poll_events()
-            self.screen.blit(self.screen_bg, (0, 0))
 
-            self.update()
-            self.draw()
+            # a simulação anda em passos fixos, mesmo quando os quadros atrasam
+            start = time.perf_counter()
+            ticks = 0
+            while self.lag >= step * 0.75 and ticks < self.max_ticks:
+                if not self.state.is_paused:
+                    self.timer.update(step)
+                self.update()
+                if self.stream is not None:
+                    self.stream.push(self.state)
+                if self.recorder is not None:
+                    self.recorder.capture(self.state)
+                self.lag -= step
+                ticks += 1
+
+            dropped = 0
+            if self.lag >= step:
+                dropped = int(self.lag / step)
+                self.lag -= dropped * step
+
+            self.ui_manager.update(elapsed)
+            update_cost = time.perf_counter() - start
+
+            render_cost = None
+            if self.governor.should_render():
+                start = time.perf_counter()
+                self.render()
+                render_cost = time.perf_counter() - start
+
+            self.governor.measure(update_cost, render_cost, ticks, dropped)
+
+        if self.recorder is not None:
+            self.recorder.stop()
+            if self.recorder.error is not None and not SHOW_STATS:
+                print(f'Neori: {self.recorder.report()}')
+        if SHOW_STATS:
+            self.print_stats()
+
+    def print_stats(self):
+        print(f'Neori: primeiro quadro em {self.first_frame*1000:.0f} ms')
+        print(f'Neori: {self.governor.report()}')
+        if self.recorder is not None:
+            print(f'Neori: {self.recorder.report()}')
+        if self.latency['turns'] > 0:
+            mean = self.latency['total'] / self.latency['turns'] * 1000
+            worst = self.latency['worst'] * 1000
+            print(f'Neori: latência de entrada média {mean:.1f} ms, pior {worst:.1f} ms')
+
+    def render(self):
+        self.camera.detail = self.governor.detail
+        self.screen.blit(self.screen_bg, (0, 0))
+        self.draw()
+        self.ui_manager.draw_ui(self.screen)
+
+        # top border
+        if not self.main_menu.is_open:
+            width = self.screen.get_width()
+            pygame.draw.rect(self.screen, colors.CELL, Rect(0, 40-2, width, 2))
 
-            self.ui_manager.update(self.frametime)
-            self.ui_manager.draw_ui(self.screen)
+        pygame.display.update()
 
-            # top border
-            if not self.main_menu.is_open:
-                width = self.screen.get_width()
-                pygame.draw.rect(self.screen, colors.CELL, Rect(0, 40-2, width, 2))
+        if self.first_frame == 0:
+            self.first_frame = time.perf_counter() - self.started
 
-            pygame.display.update()
+    def spectate(self, sock):
+        if self.stream is None:
+            self.stream = FrameStream()
+        self.stream.add(sock)
+
+    def record(self, path: str):
+        self.recorder = Recorder(path)
 
     def quit(self):
         self.state.is_running = False
@@ -146,10 +251,18 @@ class NeoriGame:
         self.main_menu.open()
         self.screen_bg.fill(pygame.Color("#121212"))
         self.canvas = self.screen.subsurface(self.screen.get_rect())
-        self.state = GameState(*self.canvas.get_size(), 16)
-        self.interface.panel.hide()
-        self.ui_gameover.hide()
-        self.pause_menu.close()
+        state = GameState(*self.canvas.get_size(), 16)
+        self.sim = Simulation(state, self.tuning, attract=True)
+        self.camera = Camera(self.state.world, *self.canvas.get_size())
+        if self.is_built('attract'):
+            self.attract.restart()
+
+        if self.is_built('interface'):
+            self.interface.panel.hide()
+        if self.is_built('ui_gameover'):
+            self.ui_gameover.hide()
+        if self.is_built('pause_menu'):
+            self.pause_menu.close()
 
     def start_game(self):
         self.timer.reset()
@@ -158,9 +271,26 @@ class NeoriGame:
         self.pause_menu.close()
         self.interface.panel.show()
         self.canvas = self.screen.subsurface(Rect(0, 40, *self.canvas_size))
-        self.state = GameState(*self.canvas_size, self.resolution)
+        state = GameState(*self.world_size, self.resolution)
+        self.sim = Simulation(state, self.tuning)
+        self.camera = Camera(self.state.world, *self.canvas_size)
+        self.turns.clear()
         self.screen_bg.fill(pygame.Color('#080808'))
 
+    def resume_game(self):
+        self.state.is_paused = False
+        self.pause_menu.toggle()
+        if self.state.game_over:
+            self.start_game()
+
+    def leave_game(self):
+        self.state.is_paused = False
+        self.pause_menu.close()
+        self.goto_main_menu()
+
+    def show_guide(self):
+        self.guide_ui.panel.show()
+
     def poll_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -168,27 +298,9 @@ class NeoriGame:
             if event.type == pygame.KEYDOWN:
                 self.on_keydown(event)
             if event.type == gui.UI_BUTTON_PRESSED:
-                if event.ui_element == self.main_menu.play:
-                    self.start_game()
-                elif event.ui_element == self.main_menu.quit:
-                    self.quit()
-                elif event.ui_element == self.pause_menu.quit:
-                    self.quit()
-                elif event.ui_element == self.pause_menu.play:
-                    self.state.is_paused = False
-                    self.pause_menu.toggle()
-                    if self.state.game_over:
-                        self.start_game()
-                elif event.ui_element == self.pause_menu.menu:
-                    self.state.is_paused = False
-                    self.pause_menu.close()
-                    self.goto_main_menu()
-                elif event.ui_element == self.pause_menu.help:
-                    self.guide_ui.panel.show()
-                elif event.ui_element == self.main_menu.help:
-                    self.guide_ui.panel.show()
-                elif event.ui_element == self.guide_ui.close:
-                    self.guide_ui.panel.hide()
+                action = self.actions.get(event.ui_element)
+                if action is not None:
+                    action()
 
             self.ui_manager.process_events(event)
 
@@ -205,37 +317,46 @@ class NeoriGame:
             new_dir = (0, 1)
         if event.key == pygame.K_ESCAPE:
             self.state.is_paused = not self.state.is_paused
+            self.turns.clear()
             if not self.main_menu.is_open:
                 self.pause_menu.toggle()
             if not self.state.game_over:
                 self.pause_menu.container.set_relative_position((0, -60))
 
         if event.key == pygame.K_SPACE:
-            self.drop_charge()
+            self.sim.drop_charge()
+
+        if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.camera.set_zoom(self.camera.zoom + 1)
+        if event.key in (pygame.K_EQUALS, pygame.K_KP_PLUS):
+            self.camera.set_zoom(self.camera.zoom - 1)
 
-        if not new_dir == None:
-            self.state.snake.change_dir(new_dir)
+        # pausado ou no menu a cobra não anda, a curva ficaria para depois
+        playing = not self.state.is_paused and not self.main_menu.is_open
+        if not new_dir == None and playing:
+            self.turns.push(self.state.snake, new_dir, time.perf_counter())
 
     def draw(self):
         self.draw_world()
         self.draw_snake()
 
     def draw_rect(self, i: int, j: int, color: Color):
-        r = self.state.world.res
-        pygame.draw.rect(self.canvas, color, Rect(i*r, j*r, r, r))
+        rect = self.camera.rect(i, j)
+        if rect is not None:
+            pygame.draw.rect(self.canvas, color, rect)
+
+    def draw_cells(self, cells):
+        # cada célula vira um pixel, depois a imagem é ampliada
+        image = pygame.surfarray.make_surface(PALETTE[cells])
+        image.set_colorkey(colors.BLACK)
+        size = (cells.shape[0] * self.camera.scale, cells.shape[1] * self.camera.scale)
+        self.canvas.blit(pygame.transform.scale(image, size), self.camera.offset)
 
     def draw_world(self):
-        for (i, j), cell in self.state.world.iterator:
-            if cell == Cell.Healthy:
-                self.draw_rect(i, j, colors.CELL)
-            elif cell == Cell.Infected:
-                self.draw_rect(i, j, colors.INFECTED)
-            elif cell == Cell.Immune:
-                self.draw_rect(i, j, colors.IMMUNE)
-            elif cell == Cell.SpawnInfected:
-                self.draw_rect(i, j, colors.SPAWN)
-            elif cell == Cell.SpawnImmune:
-                self.draw_rect(i, j, colors.IMMUNE)
+        if not self.main_menu.is_open:
+            self.camera.follow(self.state.snake.head)
+
+        self.draw_cells(self.camera.view(self.state.world.curr))
 
         for food in self.state.foods:
             self.draw_rect(*food.pos, food.color)
@@ -262,166 +383,23 @@ class NeoriGame:
         if self.state.is_paused:
             return
 
-        self.interface.update(self)
-        self.events.frozen.update(self.frametime)
-        if not self.state.is_frozen:
-            self.events.food.update(self.frametime)
-            self.events.flames.update(self.frametime)
-            self.events.infection.update(self.frametime)
-
-        if not self.main_menu.is_open:
-            self.update_snake()
-            self.update_foods()
-
-        if not self.state.is_frozen:
-            self.update_world()
-        elif self.events.frozen.elapsed(6):
-            self.state.is_frozen = False
-            self.events.frozen.stop()
-
-    def update_world(self):
-        events = self.events
-        world  = self.state.world
-        spawns = self.state.spawns
-
-        for (i, j), cell in world.iterator:
-            if cell == Cell.SpawnImmune and events.flames.elapsed(0.2):
-                world.set_cell(i, j, Cell.Immune)
-            if cell == Cell.Immune and events.flames.elapsed(5):
-                world.set_cell(i, j, Cell.Healthy)
-            elif cell == Cell.SpawnInfected and events.infection.elapsed(9):
-                world.set_cell(i, j, Cell.Infected)
-            else:
-                world.update_at(i, j)
-
-        world.update()
-
-        # update infection
-        cell_count = world.cell_count
-        infections = cell_count[Cell.Infected]
-        healthy = cell_count[Cell.Healthy]
-        immune = cell_count[Cell.Immune]
-        spawn_immune = cell_count[Cell.SpawnImmune]
-        non_infected = healthy + immune + spawn_immune
-
-        if infections == 0 and self.state.infections > 0:
-            self.state.score += 10
-
-        # todas as células estão infectadas
-        if infections > 0 and non_infected == 0 and not self.main_menu.is_open:
-            self.state.game_over = True
-            self.state.info = 'A infecção venceu!'
-        if self.main_menu.is_open and healthy < 12 and self.events.flames.elapsed(5):
-            self.events.flames.reset()
-            world.set_circular_ring(*world.rand_cell(), Cell.SpawnImmune, size=8, th=2)
-
-        if infections - self.state.infections < 10:
-            events.infection.resume()
-        elif not events.infection.elapsed(1):
-            events.infection.stop()
-            self.state.spawns.clear()
-
-        # infection spawn
-        if events.infection.elapsed(5):
-            if len(spawns) == 0:
-                for _ in range(random.randint(1, 3)):
-                    spawns.append(self.state.world.rand_cell())
-            else:
-                percent = (events.infection.time-5) / 4
-                radius  = 1 + math.floor(percent * 8)
-                for spawn in spawns:
-                    self.state.world.set_circular_ring(*spawn, Cell.SpawnInfected, radius, th=1)
-
-        if events.infection.elapsed(9):
-            events.infection.reset()
-            spawns.clear()
-
-        self.state.infections = infections
-
-    def update_snake(self):
-        snake = self.state.snake
-        world = self.state.world
-        cell = self.state.world.curr[*snake.head]
-        snake.update()
-
-        if cell == Cell.Infected:
-            if self.state.is_frozen:
-                self.state.charge += 0.20
-                self.state.score  += 2
-                world.set_cell(*snake.head, Cell.Dead)
+        # o fundo do menu é simulado até fechar um ciclo, depois só repetido
+        if self.main_menu.is_open:
+            if self.attract.ready:
+                self.state.world.curr = self.attract.next()
             else:
-                self.state.charge += 0.10
-                self.state.score  += 1
-                world.set_square_region(*snake.head, Cell.Dead, size=2)
-
-        i, j = snake.head
-        if not (0 <= i < world.cols) or not (0 <= j < world.rows):
-            self.state.game_over = True
-            self.state.info = 'Tentou sair do mapa'
-
-        if snake.dir != (0, 0):
-            for part in snake.body[0:-1]:
-                if world.curr[*part] == Cell.Infected:
-                    world.set_cell(*part, Cell.Dead)
-
-                if snake.head == part:
-                    self.state.game_over = True
-                    self.state.info = 'Tentou se comer'
+                self.sim.update(self.frametime)
+                self.attract.record(self.state.world.curr)
+            return
 
-        self.state.charge = clamp(self.state.charge, 0, 3)
+        self.interface.update(self)
 
-    def update_foods(self):
-        world = self.state.world
-        snake = self.state.snake
-        foods = self.state.foods
-        food_event = self.events.food
-
-        if food_event.elapsed(10):
-            foods.clear()
-            food_event.reset()
-
-        if len(foods) == 0 and food_event.elapsed(1):
-            foods.append(Food(*world.rand_cell(), type=Fruit.Apple))
-
-            if random.choice((0, 1)) == 0:
-                foods.append(Food(*world.rand_cell()))
-            if random.choice((0, 1)) == 0:
-                foods.append(Food(*world.rand_cell()))
-
-            food_event.reset()
-
-        for i, food in enumerate(foods):
-            if world.curr[*food.pos] == Cell.Infected:
-                foods.pop(i)
-                continue
-
-            if snake.head == food.pos:
-                foods.pop(i)
-                if food.type == Fruit.Apple:
-                    snake.grow()
-                    self.state.score += 4
-                    self.state.charge += 0.15
-                elif food.type == Fruit.Lemon:
-                    snake.grow()
-                    self.state.score += 2
-                    self.state.charge += 0.25
-                    self.state.world.set_circular_region(*food.pos, Cell.SpawnImmune, 6)
-                    self.events.flames.reset()
-                elif food.type == Fruit.Amora:
-                    self.state.score += 2
-                    self.state.is_frozen = True
-                    self.events.frozen.reset()
-                    self.events.frozen.resume()
-
-    def drop_charge(self):
-        if self.state.charge >= 1:
-            strength = 8
-
-            if self.state.charge >= 3:
-                self.state.charge = 0.0
-                strength += 4
-            else:
-                self.state.charge -= 1
+        stamp = self.turns.pop(self.state.snake)
+        self.sim.update(self.frametime)
 
-            self.state.world.set_circular_region(*self.state.snake.head, Cell.SpawnImmune, strength)
-            self.events.flames.reset()
+        # tempo entre a tecla e o movimento da cobra
+        if stamp is not None:
+            latency = time.perf_counter() - stamp
+            self.latency['turns'] += 1
+            self.latency['total'] += latency
+            self.latency['worst'] = max(self.latency['worst'], latency)
@@ -0,0 +1,100 @@
+from typing import Dict, List, Tuple
+
+class Governor:
+    """
+    Mede o custo dos quadros em relação ao orçamento de tempo e troca
+    qualidade de renderização por folga, sem mexer no ritmo da simulação.
+    """
+    budget      : float
+    level       : int
+    update_cost : float
+    render_cost : float
+    frame       : int
+    calm        : int
+    cooldown    : int
+    metrics     : Dict[str, int]
+    frames      : List[int]
+
+    # (renderiza um a cada N quadros, tamanho do bloco de detalhe)
+    levels: Tuple[Tuple[int, int], ...] = ((1, 1), (1, 2), (2, 2), (3, 2), (3, 4))
+
+    high     = 0.90  # acima disso a qualidade cai
+    low      = 0.50  # abaixo disso, por `patience` quadros, a qualidade sobe
+    patience = 30
+    settle   = 10    # quadros ignorados depois de cada mudança
+    smooth   = 0.2
+
+    def __init__(self, framerate: int) -> None:
+        self.budget = 1.0 / framerate
+        self.level = 0
+        self.update_cost = 0.0
+        self.render_cost = 0.0
+        self.frame = 0
+        self.calm = 0
+        self.cooldown = 0
+        self.frames = [0] * len(self.levels)
+        self.metrics = {
+            'frames': 0,
+            'rendered': 0,
+            'skipped': 0,
+            'ticks': 0,
+            'dropped_ticks': 0,
+            'degraded': 0,
+            'restored': 0,
+        }
+
+    @property
+    def render_every(self) -> int:
+        return self.levels[self.level][0]
+
+    @property
+    def detail(self) -> int:
+        return self.levels[self.level][1]
+
+    @property
+    def load(self) -> float:
+        cost = self.update_cost + self.render_cost / self.render_every
+        return cost / self.budget
+
+    def should_render(self) -> bool:
+        return self.frame % self.render_every == 0
+
+    def measure(self, update_cost: float, render_cost: float, ticks: int, dropped: int):
+        rendered = render_cost is not None
+        metrics = self.metrics
+        metrics['frames'] += 1
+        metrics['ticks'] += ticks
+        metrics['dropped_ticks'] += dropped
+        metrics['rendered' if rendered else 'skipped'] += 1
+        self.frames[self.level] += 1
+        self.frame += 1
+
+        self.update_cost += (update_cost - self.update_cost) * self.smooth
+        if rendered:
+            self.render_cost += (render_cost - self.render_cost) * self.smooth
+
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return
+
+        load = self.load
+        if load > self.high and self.level < len(self.levels) - 1:
+            self.change(self.level + 1)
+            metrics['degraded'] += 1
+        elif load < self.low and self.level > 0:
+            self.calm += 1
+            if self.calm >= self.patience:
+                self.change(self.level - 1)
+                metrics['restored'] += 1
+        else:
+            self.calm = 0
+
+    def change(self, level: int):
+        self.level = level
+        self.calm = 0
+        self.cooldown = self.settle
+
+    def report(self) -> str:
+        metrics = ', '.join(f'{k}={v}' for k, v in self.metrics.items())
+        levels = ' '.join(str(count) for count in self.frames)
+        return f'{metrics}, level={self.level}, frames/level=[{levels}]'
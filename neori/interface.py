@@ -2,7 +2,8 @@ import time
 import math
 import pygame
 
-from pygame import Rect
+from typing import Any, Callable, Dict, List, Tuple
+from pygame import Rect, Surface
 from pygame.transform import scale
 from pygame_gui import UIManager
 from pygame_gui.elements import UIButton
@@ -13,7 +14,62 @@ from pygame_gui.elements import UIStatusBar
 from pygame_gui.core import ObjectID as ID
 
 from neori import colors
-from neori.utils import hex, clamp
+from neori.utils import Vec2i, hex, clamp
+
+# a mesma imagem do tema é compartilhada por todos os botões
+scaled_images: Dict[Tuple[int, Vec2i], Tuple[Surface, Surface]] = {}
+
+def cached_scale(image: Surface, size: Vec2i) -> Surface:
+    """Redimensiona a imagem uma vez por tamanho, reaproveitando o resultado."""
+    key = (id(image), size)
+    if key not in scaled_images:
+        # guarda a original junto para o id não ser reaproveitado
+        scaled_images[key] = (image, scale(image, size))
+    return scaled_images[key][1]
+
+class Binding:
+    value  : Any
+    source : Callable[..., Any]
+    target : Callable[[Any], None]
+
+    def __init__(self, source, target) -> None:
+        self.value = None
+        self.source = source
+        self.target = target
+
+class Bindings:
+    """
+    Liga valores do estado do jogo aos elementos da interface.
+    Todos os valores são lidos antes de qualquer escrita, e só os
+    elementos cujo valor exibido mudou são atualizados.
+    """
+    items   : List[Binding]
+    pending : List[Binding]
+
+    def __init__(self) -> None:
+        self.items = []
+        self.pending = []
+
+    def bind(self, source, target):
+        self.items.append(Binding(source, target))
+
+    def poll(self, *args):
+        for binding in self.items:
+            value = binding.source(*args)
+            if value != binding.value:
+                binding.value = value
+                self.pending.append(binding)
+
+    def flush(self) -> int:
+        count = len(self.pending)
+        for binding in self.pending:
+            binding.target(binding.value)
+        self.pending.clear()
+        return count
+
+    def update(self, *args) -> int:
+        self.poll(*args)
+        return self.flush()
 
 class GameMenu:
     is_open : bool
@@ -40,9 +96,9 @@ class GameMenu:
             **kw)
 
         self.cursor.top += 64
-        button.normal_image=scale(button.normal_image, (280, 60))
-        button.hovered_image=scale(button.hovered_image, (280, 60))
-        button.selected_image=scale(button.selected_image, (280, 60))
+        button.normal_image=cached_scale(button.normal_image, (280, 60))
+        button.hovered_image=cached_scale(button.hovered_image, (280, 60))
+        button.selected_image=cached_scale(button.selected_image, (280, 60))
         button.rebuild()
 
         return button
@@ -98,6 +154,7 @@ class GameOverScreen:
     size_label  : UILabel
     score_label : UILabel
     cursor      : Rect
+    bindings    : Bindings
 
     def __init__(self, manager: UIManager) -> None:
         self.cursor = Rect(20, 50, -1, -1)
@@ -109,7 +166,7 @@ class GameOverScreen:
             anchors={'centerx':'centerx'},
             object_id=ID('#gameover.panel'))
 
-        self.panel.background_image=scale(self.panel.background_image, (400, 200))
+        self.panel.background_image=cached_scale(self.panel.background_image, (400, 200))
         self.panel.rebuild()
 
         self.title = UILabel(
@@ -135,6 +192,12 @@ class GameOverScreen:
         self.time = self.add_right_label(manager, 'time', '00:00')
         self.cursor.top += 35
 
+        self.bindings = Bindings()
+        self.bindings.bind(lambda state, _: state.info, self.info.set_text)
+        self.bindings.bind(lambda state, _: str(state.score), self.score.set_text)
+        self.bindings.bind(lambda state, _: str(len(state.snake.body)), self.size.set_text)
+        self.bindings.bind(lambda _, elapsed: time.strftime('%M:%S', time.gmtime(elapsed)), self.time.set_text)
+
     def add_left_label(self, manager, id, text):
         self.cursor.left = 20
         self.cursor.width = -1
@@ -159,12 +222,7 @@ class GameOverScreen:
         return label
 
     def set_state(self, state, elapsed):
-        time_label = time.strftime('%M:%S', time.gmtime(elapsed))
-
-        self.info.set_text(state.info)
-        self.score.set_text(str(state.score))
-        self.size.set_text(str(len(state.snake.body)))
-        self.time.set_text(time_label)
+        self.bindings.update(state, elapsed)
 
     def show(self):
         self.panel.show()
@@ -177,6 +235,8 @@ class GameInterface:
     score  : UILabel
     charge : UILabel
     effect : UIStatusBar
+    threat : UILabel
+    bindings : Bindings
 
     def __init__(self, manager: UIManager) -> None:
         rect = manager.get_root_container().get_rect()
@@ -207,17 +267,50 @@ class GameInterface:
             relative_rect=Rect(210, 5, -1, -1),
             object_id=ID("#charge", "@text"))
 
-    def update(self, game):
-        self.score.set_text(str(game.state.score))
+        self.threat = UILabel(
+            text='',
+            manager=manager,
+            container=self.panel,
+            relative_rect=Rect(rect.width - 336, 5, 320, -1),
+            object_id=ID("#threat", "@text"))
+
+        self.bindings = Bindings()
+        self.bindings.bind(self.score_text, self.score.set_text)
+        self.bindings.bind(self.charge_text, self.charge.set_text)
+        self.bindings.bind(self.effect_percent, self.set_effect)
+        self.bindings.bind(self.threat_text, self.threat.set_text)
+
+    def score_text(self, game):
+        return str(game.state.score)
 
+    def charge_text(self, game):
+        charge = math.floor(game.state.charge)
+        return '0 ' * clamp(charge, 0, 3)
+
+    def effect_percent(self, game):
         percent = 0
         if game.state.is_frozen:
-            percent = 1 - clamp(game.events.frozen.time/6)
+            events = game.events
+            percent = clamp(events.effects.remaining(events.frozen) / game.sim.tuning.frozen_time)
+
+        # arredonda para a largura da barra, mudanças menores não aparecem
+        width = self.effect.rect.width
+        return round(percent * width) / width
+
+    def threat_text(self, game):
+        count = game.state.clusters.count
+        if count == 0:
+            return ''
 
+        threat = game.sim.threat()
+        level = 'baixa' if threat < 1/3 else 'média' if threat < 2/3 else 'alta'
+        return f'{count} focos  ameaça {level}'
+
+    def set_effect(self, percent):
         self.effect.percent_full = percent
 
-        charge = math.floor(game.state.charge)
-        self.charge.set_text('0 ' * clamp(charge, 0, 3))
+    def update(self, game):
+        self.bindings.update(game)
 
 
 TUTORIAL = '''
@@ -0,0 +1,403 @@
+import math
+import random
+
+from typing import List, Tuple
+from functools import partial
+from dataclasses import dataclass
+
+from neori.clusters import ClusterMap
+from neori.food import Food, Fruit, Fruits, Weights
+from neori.snake import Snake
+from neori.utils import Vec2i, clamp
+from neori.utils import Event, Scheduler
+from neori.world import Cell, Priority
+from neori.world import WorldGrid
+
+@dataclass
+class Tuning:
+    weights         : Tuple[float, ...] = tuple(Weights)
+    ignite_time     : float = 0.2
+    immune_time     : float = 5
+    infection_delay : float = 5
+    infection_time  : float = 9
+    infection_hold  : float = 1
+    infection_burst : int   = 10
+    spawn_candidates: int   = 8
+    spawn_clearance : float = 6
+    frozen_time     : float = 6
+    food_delay      : float = 1
+    food_time       : float = 10
+    charge_infected : float = 0.10
+    charge_frozen   : float = 0.20
+    charge_apple    : float = 0.15
+    charge_lemon    : float = 0.25
+
+class GameState:
+    snake      : Snake
+    world      : WorldGrid
+    clusters   : ClusterMap
+    score      : int
+    foods      : List[Food]
+    infections : int
+    live       : int
+    is_paused  : bool
+    is_running : bool
+    is_frozen  : bool
+    game_over  : bool
+    charge     : float
+    explosion  : Vec2i
+    spawns     : List[Vec2i]
+    info       : str
+
+    def __init__(self, width, height, res) -> None:
+        self.world = WorldGrid(width, height, res)
+        self.clusters = ClusterMap(self.world)
+        self.reset()
+
+    def reset(self):
+        self.snake = Snake(*self.world.rand_cell())
+        self.score = 0
+        self.foods = []
+        self.charge = 0.0
+        self.infections = 0
+        self.live = 0
+        self.is_frozen = False
+        self.is_paused = False
+        self.is_running = True
+        self.game_over = False
+        self.explosion = None
+        self.info = ''
+        self.spawns = []
+        self.clusters.reset()
+
+class GameEvents:
+    world      : Scheduler
+    effects    : Scheduler
+    food       : Event
+    frozen     : Event
+    flames     : List[Event]
+    infection  : List[Event]
+    food_time  : float
+    cycle_time : float
+    radius     : int
+    ignited    : bool
+    expired    : bool
+    released   : bool
+    held       : bool
+
+    def __init__(self) -> None:
+        # o relógio do mundo para enquanto o tempo estiver congelado,
+        # os efeitos (como o próprio congelamento) continuam rodando
+        self.world = Scheduler()
+        self.effects = Scheduler()
+        self.food = None
+        self.frozen = None
+        self.flames = []
+        self.infection = []
+        self.food_time = 0.0
+        self.cycle_time = 0.0
+        self.radius = 0
+        self.ignited = False
+        self.expired = False
+        self.released = False
+        self.held = False
+
+class Simulation:
+    """
+    As regras do jogo, sem janela nem interface. No modo de atração
+    (o fundo do menu) não há cobra nem frutas e o jogo nunca acaba.
+    """
+    state   : GameState
+    events  : GameEvents
+    tuning  : Tuning
+    attract : bool
+
+    def __init__(self, state: GameState, tuning: Tuning = None, attract=False) -> None:
+        self.state = state
+        self.tuning = Tuning() if tuning is None else tuning
+        self.attract = attract
+        self.reset_events()
+
+    def reset(self):
+        self.state.world.reset()
+        self.state.reset()
+        self.reset_events()
+
+    def reset_events(self):
+        self.events = GameEvents()
+        self.ignite()
+        self.start_infection()
+        if not self.attract:
+            self.events.food = self.events.world.after(self.tuning.food_delay, self.spawn_foods)
+
+    def update(self, dt: float):
+        self.events.effects.update(dt)
+        self.events.world.update(dt)
+
+        if not self.attract:
+            self.update_snake()
+            self.update_foods()
+
+        if not self.state.is_frozen:
+            self.update_world()
+        else:
+            self.state.world.apply_edits()
+        self.state.world.finish_edits()
+        self.state.clusters.update()
+
+    def ignite(self):
+        events = self.events
+        Scheduler.cancel(events.flames)
+        events.ignited = False
+        events.expired = False
+        events.flames.append(events.world.after(self.tuning.ignite_time, self.on_ignited))
+        events.flames.append(events.world.after(self.tuning.immune_time, self.on_expired))
+
+    def on_ignited(self):
+        self.events.ignited = True
+
+    def on_expired(self):
+        self.events.expired = True
+
+    def freeze(self):
+        events = self.events
+        self.state.is_frozen = True
+        events.world.pause()
+        if events.frozen is not None:
+            events.frozen.cancel()
+        events.frozen = events.effects.after(self.tuning.frozen_time, self.unfreeze)
+
+    def unfreeze(self):
+        self.state.is_frozen = False
+        self.events.world.resume()
+        self.events.frozen = None
+
+    def start_infection(self):
+        events = self.events
+        clock = events.world
+        delay = self.tuning.infection_delay
+        growth = (self.tuning.infection_time - delay) / 8
+
+        events.cycle_time = clock.time
+        events.infection.append(clock.after(delay, self.spawn_infection))
+        for radius in range(2, 9):
+            grow = partial(self.grow_infection, radius)
+            events.infection.append(clock.after(delay + (radius-1)*growth, grow))
+        events.infection.append(clock.after(self.tuning.infection_time, self.release_infection))
+
+    def stop_infection(self):
+        events = self.events
+        Scheduler.cancel(events.infection)
+        events.radius = 0
+        self.state.spawns.clear()
+
+    def spawn_infection(self):
+        # com um foco dominando o mundo, aparecem menos focos novos
+        most = 3 - round(2 * self.threat())
+        for _ in range(random.randint(1, most)):
+            self.state.spawns.append(self.spawn_point())
+        self.events.radius = 1
+
+    def spawn_point(self) -> Vec2i:
+        """
+        Entre algumas células sorteadas, a mais longe dos focos e dos
+        outros pontos de spawn, sem cair em cima da cobra.
+        """
+        world = self.state.world
+        clusters = self.state.clusters
+        head = self.state.snake.head
+        best, score = None, -1.0
+
+        for _ in range(self.tuning.spawn_candidates):
+            cell = world.rand_cell()
+            if not self.attract and math.dist(cell, head) < self.tuning.spawn_clearance:
+                continue
+
+            distance = clusters.distance(*cell)
+            for spawn in self.state.spawns:
+                distance = min(distance, math.dist(cell, spawn))
+            if distance > score:
+                best, score = cell, distance
+
+        return world.rand_cell() if best is None else best
+
+    def threat(self) -> float:
+        """Parcela das células vivas tomada pelo maior foco de infecção."""
+        largest = self.state.clusters.largest
+        if largest is None:
+            return 0.0
+        return float(largest['size']) / max(self.state.live, 1)
+
+    def grow_infection(self, radius: int):
+        self.events.radius = radius
+
+    def release_infection(self):
+        self.events.released = True
+
+    def update_world(self):
+        events = self.events
+        world  = self.state.world
+        spawns = self.state.spawns
+
+        # o que a cobra, as frutas e as cargas mudaram entra antes das regras
+        world.apply_edits()
+
+        # transições temporizadas, as células que expiram ou são
+        # liberadas não passam pelas regras nesta geração
+        curr = world.curr
+        expired = (curr == Cell.Immune) & events.expired
+        released = (curr == Cell.SpawnInfected) & events.released
+        ignited = (curr == Cell.SpawnImmune) & events.ignited
+
+        curr[expired] = Cell.Healthy
+        curr[released] = Cell.Infected
+        curr[ignited] = Cell.Immune
+
+        world.step(keep=expired | released)
+        world.update()
+
+        # update infection
+        cell_count = world.cell_count
+        infections = cell_count[Cell.Infected]
+        healthy = cell_count[Cell.Healthy]
+        immune = cell_count[Cell.Immune]
+        spawn_immune = cell_count[Cell.SpawnImmune]
+        non_infected = healthy + immune + spawn_immune
+        self.state.live = int(cell_count[1:].sum())
+
+        if infections == 0 and self.state.infections > 0:
+            self.state.score += 10
+
+        # todas as células estão infectadas
+        if infections > 0 and non_infected == 0 and not self.attract:
+            self.state.game_over = True
+            self.state.info = 'A infecção venceu!'
+        if self.attract and healthy < 12 and events.expired:
+            self.ignite()
+            world.set_circular_ring(*world.rand_cell(), Cell.SpawnImmune, size=8, th=2)
+
+        # segura o ciclo de infecção enquanto ela cresce rápido demais
+        if infections - self.state.infections < self.tuning.infection_burst:
+            if events.held:
+                events.held = False
+                self.start_infection()
+        elif events.held or events.world.time - events.cycle_time <= self.tuning.infection_hold:
+            if not events.held:
+                events.held = True
+                self.stop_infection()
+
+        # infection spawn, na liberação os anéis já viraram infecção
+        if events.radius > 0 and not events.released:
+            for spawn in spawns:
+                self.state.world.set_circular_ring(*spawn, Cell.SpawnInfected, events.radius, th=1)
+
+        # os anéis aparecem já nesta geração
+        world.apply_edits()
+
+        if events.released:
+            events.released = False
+            self.stop_infection()
+            self.start_infection()
+
+        self.state.infections = infections
+
+    def update_snake(self):
+        snake = self.state.snake
+        world = self.state.world
+        cell = self.state.world.curr[*snake.head]
+        snake.update()
+
+        if cell == Cell.Infected:
+            if self.state.is_frozen:
+                self.state.charge += self.tuning.charge_frozen
+                self.state.score  += 2
+                world.set_cell(*snake.head, Cell.Dead, Priority.Snake)
+            else:
+                self.state.charge += self.tuning.charge_infected
+                self.state.score  += 1
+                world.set_square_region(*snake.head, Cell.Dead, size=2, priority=Priority.Snake)
+
+        i, j = snake.head
+        if not (0 <= i < world.cols) or not (0 <= j < world.rows):
+            self.state.game_over = True
+            self.state.info = 'Tentou sair do mapa'
+
+        if snake.dir != (0, 0):
+            for part in snake.body[0:-1]:
+                if world.curr[*part] == Cell.Infected:
+                    world.set_cell(*part, Cell.Dead, Priority.Snake)
+
+                if snake.head == part:
+                    self.state.game_over = True
+                    self.state.info = 'Tentou se comer'
+
+        self.state.charge = clamp(self.state.charge, 0, 3)
+
+    def update_foods(self):
+        world = self.state.world
+        snake = self.state.snake
+        foods = self.state.foods
+        events = self.events
+        had_foods = len(foods) > 0
+
+        for i, food in enumerate(foods):
+            if world.curr[*food.pos] == Cell.Infected:
+                foods.pop(i)
+                continue
+
+            if snake.head == food.pos:
+                foods.pop(i)
+                if food.type == Fruit.Apple:
+                    snake.grow()
+                    self.state.score += 4
+                    self.state.charge += self.tuning.charge_apple
+                elif food.type == Fruit.Lemon:
+                    snake.grow()
+                    self.state.score += 2
+                    self.state.charge += self.tuning.charge_lemon
+                    self.state.world.set_circular_region(*food.pos, Cell.SpawnImmune, 6, Priority.Immune)
+                    self.ignite()
+                elif food.type == Fruit.Amora:
+                    self.state.score += 2
+                    self.freeze()
+
+        # as frutas voltam um pouco depois de aparecerem, ou assim que acabarem
+        if had_foods and len(foods) == 0:
+            events.food.cancel()
+            due = max(events.world.time, events.food_time + self.tuning.food_delay)
+            events.food = events.world.at(due, self.spawn_foods)
+
+    def spawn_foods(self):
+        world = self.state.world
+        foods = self.state.foods
+        clock = self.events.world
+
+        foods.append(Food(*world.rand_cell(), type=Fruit.Apple))
+
+        if random.choice((0, 1)) == 0:
+            foods.append(Food(*world.rand_cell(), type=self.rand_fruit()))
+        if random.choice((0, 1)) == 0:
+            foods.append(Food(*world.rand_cell(), type=self.rand_fruit()))
+
+        self.events.food_time = clock.time
+        self.events.food = clock.after(self.tuning.food_time, self.expire_foods)
+
+    def rand_fruit(self) -> Fruit:
+        return random.choices(Fruits, weights=self.tuning.weights)[0]
+
+    def expire_foods(self):
+        self.state.foods.clear()
+        self.events.food = self.events.world.after(self.tuning.food_delay, self.spawn_foods)
+
+    def drop_charge(self):
+        if self.state.charge >= 1:
+            strength = 8
+
+            if self.state.charge >= 3:
+                self.state.charge = 0.0
+                strength += 4
+            else:
+                self.state.charge -= 1
+
+            self.state.world.set_circular_region(*self.state.snake.head, Cell.SpawnImmune, strength, Priority.Immune)
+            self.ignite()
@@ -1,4 +1,5 @@
-from typing import List
+from collections import deque
+from typing import Deque, List, Optional, Tuple
 from neori.utils import Vec2i
 
 class Snake:
@@ -35,3 +36,35 @@ class Snake:
         dx, dy = self.dir
         if new_dir != (-dx, -dy):
             self.dir = new_dir
+
+class TurnQueue:
+    """
+    Mudanças de direção pedidas entre os ticks, com o instante em que
+    foram pedidas. Cada tick aplica no máximo uma delas, e cada pedido é
+    validado contra a última direção pedida, não a atual.
+    """
+    turns : Deque[Tuple[Vec2i, float]]
+
+    size = 3
+
+    def __init__(self) -> None:
+        self.turns = deque()
+
+    def push(self, snake: Snake, new_dir: Vec2i, stamp: float) -> bool:
+        dx, dy = self.turns[-1][0] if len(self.turns) > 0 else snake.dir
+        if new_dir in ((dx, dy), (-dx, -dy)) or len(self.turns) >= self.size:
+            return False
+
+        self.turns.append((new_dir, stamp))
+        return True
+
+    def pop(self, snake: Snake) -> Optional[float]:
+        if len(self.turns) == 0:
+            return None
+
+        new_dir, stamp = self.turns.popleft()
+        snake.change_dir(new_dir)
+        return stamp
+
+    def clear(self):
+        self.turns.clear()
@@ -0,0 +1,312 @@
+import zlib
+import struct
+import socket
+import numpy as np
+
+from typing import List, Optional, Tuple
+from neori.utils import Vec2i
+
+# cabeçalho: assinatura, tipo, flags, tick, colunas, linhas
+HEADER = struct.Struct('<2sBBIHH')
+MAGIC = b'NF'
+
+KEYFRAME = 0
+DELTA = 1
+
+SNAKE_FULL = 1
+SNAKE_DELTA = 2
+FOODS = 4
+
+COUNT = struct.Struct('<I')
+SNAKE = struct.Struct('<HH')
+POINT = np.dtype([('col', '<i2'), ('row', '<i2')])
+FOOD = np.dtype([('col', '<i2'), ('row', '<i2'), ('type', 'u1')])
+RUN = np.dtype([('index', '<u4'), ('length', '<u4'), ('state', 'u1')])
+
+FoodInfo = Tuple[int, int, int]
+
+def encode_runs(prev: np.ndarray, curr: np.ndarray) -> np.ndarray:
+    """
+    Agrupa as células que mudaram em sequências de índices
+    consecutivos que passaram para o mesmo estado.
+    """
+    index = np.flatnonzero(prev != curr)
+    runs = np.zeros(0, dtype=RUN)
+    if len(index) == 0:
+        return runs
+
+    states = curr[index]
+    breaks = np.flatnonzero((np.diff(index) != 1) | (np.diff(states) != 0)) + 1
+    starts = np.concatenate(([0], breaks))
+    runs = np.zeros(len(starts), dtype=RUN)
+    runs['index'] = index[starts]
+    runs['length'] = np.diff(np.concatenate((starts, [len(index)])))
+    runs['state'] = states[starts]
+    return runs
+
+def apply_runs(grid: np.ndarray, runs: np.ndarray):
+    if len(runs) == 0:
+        return
+
+    # expande cada sequência nos seus índices sem laço em python
+    lengths = runs['length'].astype(np.int64)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    index = np.repeat(runs['index'].astype(np.int64), lengths) + offsets
+    grid[index] = np.repeat(runs['state'], lengths)
+
+def snake_delta(prev: List[Vec2i], curr: List[Vec2i]) -> Optional[Tuple[int, List[Vec2i]]]:
+    """
+    Quantas partes saíram da cauda e quais entraram na cabeça,
+    ou `None` se o corpo novo não continuar o anterior.
+    """
+    for dropped in range(len(prev) + 1):
+        kept = len(prev) - dropped
+        if curr[:kept] == prev[dropped:]:
+            return dropped, curr[kept:]
+    return None
+
+class FrameEncoder:
+    interval : int
+    tick     : int
+    shape    : Tuple[int, int]
+    grid     : np.ndarray
+    body     : List[Vec2i]
+    foods    : List[FoodInfo]
+
+    def __init__(self, interval=60) -> None:
+        self.interval = interval
+        self.tick = 0
+        self.shape = None
+        self.grid = None
+        self.body = []
+        self.foods = []
+
+    def keyframe(self):
+        self.grid = None
+
+    def snapshot(self) -> bytes:
+        """
+        Um quadro chave com o último quadro codificado, sem mexer na
+        sequência: os deltas seguintes continuam valendo a partir dele.
+        """
+        encoder = FrameEncoder(self.interval)
+        encoder.tick = self.tick - 1
+        return encoder.encode_frame(self.grid.reshape(self.shape), self.body, self.foods)
+
+    def encode(self, state) -> bytes:
+        foods = [(*food.pos, int(food.type)) for food in state.foods]
+        return self.encode_frame(state.world.curr, list(state.snake.body), foods)
+
+    def encode_frame(self, grid: np.ndarray, body: List[Vec2i], foods: List[FoodInfo]) -> bytes:
+        cols, rows = grid.shape
+        curr = grid.astype(np.uint8).ravel()
+        is_key = (self.grid is None
+            or self.grid.shape != curr.shape
+            or self.tick % self.interval == 0)
+
+        chunks = []
+        if is_key:
+            kind = KEYFRAME
+            data = zlib.compress(curr.tobytes(), 1)
+            chunks.append(COUNT.pack(len(data)))
+            chunks.append(data)
+        else:
+            kind = DELTA
+            runs = encode_runs(self.grid, curr)
+            chunks.append(COUNT.pack(len(runs)))
+            chunks.append(runs.tobytes())
+
+        flags = 0
+        delta = None if is_key else snake_delta(self.body, body)
+        if delta is None:
+            flags |= SNAKE_FULL
+            chunks.append(SNAKE.pack(0, len(body)))
+            chunks.append(np.array(body, dtype=np.int16).reshape(-1, 2).tobytes())
+        elif delta != (0, []):
+            flags |= SNAKE_DELTA
+            dropped, added = delta
+            chunks.append(SNAKE.pack(dropped, len(added)))
+            chunks.append(np.array(added, dtype=np.int16).reshape(-1, 2).tobytes())
+
+        if is_key or foods != self.foods:
+            flags |= FOODS
+            chunks.append(COUNT.pack(len(foods)))
+            chunks.append(np.array(foods, dtype=FOOD).tobytes())
+
+        header = HEADER.pack(MAGIC, kind, flags, self.tick, cols, rows)
+        self.shape = (cols, rows)
+        self.grid = curr
+        self.body = body
+        self.foods = foods
+        self.tick += 1
+        return header + b''.join(chunks)
+
+class FrameDecoder:
+    tick  : int
+    curr  : np.ndarray
+    body  : List[Vec2i]
+    foods : List[FoodInfo]
+
+    def __init__(self) -> None:
+        self.tick = -1
+        self.curr = None
+        self.body = []
+        self.foods = []
+
+    def decode(self, data: bytes):
+        magic, kind, flags, tick, cols, rows = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('quadro inválido')
+
+        offset = HEADER.size
+        size, = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+
+        if kind == KEYFRAME:
+            raw = zlib.decompress(data[offset : offset+size])
+            grid = np.frombuffer(raw, dtype=np.uint8).copy()
+            offset += size
+        else:
+            if self.curr is None or self.curr.shape != (cols, rows):
+                raise ValueError('quadro delta sem quadro chave')
+            grid = self.curr.ravel()
+            runs = np.frombuffer(data, dtype=RUN, count=size, offset=offset)
+            apply_runs(grid, runs)
+            offset += size * RUN.itemsize
+
+        if flags & (SNAKE_FULL | SNAKE_DELTA):
+            dropped, count = SNAKE.unpack_from(data, offset)
+            offset += SNAKE.size
+            points = np.frombuffer(data, dtype=POINT, count=count, offset=offset)
+            offset += count * POINT.itemsize
+            added = [(int(p['col']), int(p['row'])) for p in points]
+            if flags & SNAKE_FULL:
+                self.body = added
+            else:
+                self.body = self.body[dropped:] + added
+
+        if flags & FOODS:
+            count, = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            foods = np.frombuffer(data, dtype=FOOD, count=count, offset=offset)
+            self.foods = [(int(f['col']), int(f['row']), int(f['type'])) for f in foods]
+
+        self.curr = grid.reshape(cols, rows)
+        self.tick = tick
+
+def send_frame(sock: socket.socket, data: bytes):
+    sock.sendall(COUNT.pack(len(data)) + data)
+
+def recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+def recv_frame(sock: socket.socket) -> Optional[bytes]:
+    header = recv_exactly(sock, COUNT.size)
+    if header is None:
+        return None
+    size, = COUNT.unpack(header)
+    return recv_exactly(sock, size)
+
+class Spectator:
+    """Um espectador conectado, com os bytes que ainda não couberam no socket."""
+    sock    : socket.socket
+    outbox  : bytearray
+    synced  : bool
+    stalled : int
+
+    def __init__(self, sock: socket.socket) -> None:
+        sock.setblocking(False)
+        self.sock = sock
+        self.outbox = bytearray()
+        self.synced = False
+        self.stalled = 0
+
+    def flush(self):
+        while self.outbox:
+            try:
+                sent = self.sock.send(self.outbox)
+            except BlockingIOError:
+                break
+            del self.outbox[:sent]
+
+class FrameStream:
+    """
+    Envia um quadro por tick da simulação para os espectadores conectados,
+    sem nunca bloquear o jogo: cada espectador tem uma fila limitada e,
+    quando ela enche, os quadros dele são descartados até a fila esvaziar
+    e ele voltar a partir de um quadro chave só dele, enquanto os outros
+    seguem com os deltas. Quem fica parado por `patience` ticks é
+    desconectado.
+    """
+    encoder    : FrameEncoder
+    outputs    : List[Spectator]
+    limit      : int
+    patience   : int
+    frames     : int
+    bytes_sent : int
+    dropped    : int
+
+    def __init__(self, interval=60, limit=64*1024, patience=150) -> None:
+        self.encoder = FrameEncoder(interval)
+        self.outputs = []
+        self.limit = limit
+        self.patience = patience
+        self.frames = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+
+    def add(self, sock: socket.socket):
+        self.outputs.append(Spectator(sock))
+
+    def remove(self, spectator: Spectator):
+        self.outputs.remove(spectator)
+        spectator.sock.close()
+
+    def push(self, state):
+        if len(self.outputs) == 0:
+            return
+
+        frame = self.encoder.encode(state)
+        data = COUNT.pack(len(frame)) + frame
+        is_key = frame[2] == KEYFRAME
+        key = None
+
+        for spectator in list(self.outputs):
+            # um delta só serve para quem recebeu o quadro anterior, quem
+            # ficou para trás espera a fila esvaziar e volta por um quadro chave
+            if spectator.synced or is_key:
+                payload = data
+            elif len(spectator.outbox) == 0:
+                if key is None:
+                    snapshot = self.encoder.snapshot()
+                    key = COUNT.pack(len(snapshot)) + snapshot
+                payload = key
+            else:
+                payload = None
+
+            if payload is None or len(spectator.outbox) + len(payload) > self.limit:
+                spectator.synced = False
+                spectator.stalled += 1
+                self.dropped += 1
+            else:
+                spectator.synced = True
+                spectator.stalled = 0
+                spectator.outbox += payload
+                self.bytes_sent += len(payload)
+
+            try:
+                spectator.flush()
+            except OSError:
+                self.remove(spectator)
+                continue
+
+            if spectator.stalled > self.patience:
+                self.remove(spectator)
+
+        self.frames += 1
@@ -0,0 +1,194 @@
+"""
+Ajuste de balanceamento por Monte Carlo: roda partidas sem janela, com
+uma cobra controlada por bot, espalhadas por vários processos, e grava os
+resultados agregados de cada conjunto de parâmetros enquanto rodam.
+
+    python -m neori.tuner --games 2000 --grid '{"frozen_time": [4, 6, 8]}'
+"""
+import os
+import json
+import math
+import random
+import argparse
+import itertools
+import numpy as np
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from typing import Any, Dict, List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from neori.bots import Bot, FlowField
+from neori.simulation import GameState, Simulation, Tuning
+
+WORLD_SIZE = (1280, 680)
+RESOLUTION = 15
+FRAMERATE = 15
+
+# uma simulação por processo, o mundo é reaproveitado entre partidas
+simulation: Simulation = None
+field: FlowField = None
+
+def worker_simulation(tuning: Tuning) -> Simulation:
+    global simulation, field
+    if simulation is None:
+        simulation = Simulation(GameState(*WORLD_SIZE, RESOLUTION), tuning)
+        field = FlowField(*simulation.state.world.size)
+    simulation.tuning = tuning
+    return simulation
+
+def play(sim: Simulation, seed: int, max_time: float) -> Dict[str, Any]:
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    sim.reset()
+    field.reset()
+
+    state = sim.state
+    bot = Bot(state.snake, field)
+    step = 1.0 / FRAMERATE
+    curve = []
+    ticks = 0
+
+    # a cobra segue o campo até a fruta ou infecção mais próxima
+    while not state.game_over and ticks * step < max_time:
+        field.track(state)
+        bot.steer()
+        if state.charge >= 1 and state.infections > 100:
+            sim.drop_charge()
+
+        sim.update(step)
+        if ticks % FRAMERATE == 0:
+            curve.append(int(state.infections))
+        ticks += 1
+
+    return {
+        'survival': ticks * step,
+        'score': state.score,
+        'reason': state.info if state.game_over else 'Tempo esgotado',
+        'curve': curve,
+    }
+
+def empty_stats() -> Dict[str, Any]:
+    return {
+        'games': 0,
+        'survival': [0.0, 0.0],
+        'score': [0.0, 0.0],
+        'reasons': {},
+        'curve_sum': [],
+        'curve_count': [],
+    }
+
+def add_result(stats: Dict[str, Any], result: Dict[str, Any]):
+    stats['games'] += 1
+    for key in ('survival', 'score'):
+        stats[key][0] += result[key]
+        stats[key][1] += result[key] ** 2
+
+    reasons = stats['reasons']
+    reasons[result['reason']] = reasons.get(result['reason'], 0) + 1
+
+    curve = result['curve']
+    missing = len(curve) - len(stats['curve_sum'])
+    if missing > 0:
+        stats['curve_sum'] += [0] * missing
+        stats['curve_count'] += [0] * missing
+    for k, value in enumerate(curve):
+        stats['curve_sum'][k] += value
+        stats['curve_count'][k] += 1
+
+def merge_stats(stats: Dict[str, Any], other: Dict[str, Any]):
+    stats['games'] += other['games']
+    for key in ('survival', 'score'):
+        stats[key][0] += other[key][0]
+        stats[key][1] += other[key][1]
+
+    for reason, count in other['reasons'].items():
+        stats['reasons'][reason] = stats['reasons'].get(reason, 0) + count
+
+    missing = len(other['curve_sum']) - len(stats['curve_sum'])
+    if missing > 0:
+        stats['curve_sum'] += [0] * missing
+        stats['curve_count'] += [0] * missing
+    for k, value in enumerate(other['curve_sum']):
+        stats['curve_sum'][k] += value
+        stats['curve_count'][k] += other['curve_count'][k]
+
+def summary(params: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+    n = stats['games']
+
+    def moments(key):
+        total, squares = stats[key]
+        mean = total / n
+        return {'mean': mean, 'std': math.sqrt(max(0.0, squares / n - mean * mean))}
+
+    curve = [s / c for s, c in zip(stats['curve_sum'], stats['curve_count'])]
+    return {
+        'params': params,
+        'games': n,
+        'survival': moments('survival'),
+        'score': moments('score'),
+        'reasons': stats['reasons'],
+        'infection_curve': curve,
+    }
+
+def run_batch(params: Dict[str, Any], seeds: List[int], max_time: float) -> Dict[str, Any]:
+    sim = worker_simulation(make_tuning(params))
+    stats = empty_stats()
+    for seed in seeds:
+        add_result(stats, play(sim, seed, max_time))
+    return stats
+
+def make_tuning(params: Dict[str, Any]) -> Tuning:
+    params = {k: tuple(v) if isinstance(v, list) else v for k, v in params.items()}
+    return Tuning(**params)
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+def tune(param_sets: List[Dict[str, Any]], games=1000, out='tuning.jsonl',
+         workers=None, batch=25, max_time=180.0, seed=0) -> List[Dict[str, Any]]:
+    """
+    Roda `games` partidas por conjunto de parâmetros e acrescenta uma
+    linha em `out` a cada lote concluído, com o agregado até ali.
+    """
+    totals = [empty_stats() for _ in param_sets]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(out, 'a') as output:
+        futures = {}
+        for index, params in enumerate(param_sets):
+            make_tuning(params) # falha cedo com parâmetros inválidos
+            for start in range(0, games, batch):
+                seeds = [seed + start + k for k in range(min(batch, games - start))]
+                future = pool.submit(run_batch, params, seeds, max_time)
+                futures[future] = index
+
+        for future in as_completed(futures):
+            index = futures[future]
+            merge_stats(totals[index], future.result())
+            line = summary(param_sets[index], totals[index])
+            line['done'] = totals[index]['games'] == games
+            output.write(json.dumps(line) + '\n')
+            output.flush()
+
+    return [summary(params, stats) for params, stats in zip(param_sets, totals)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--grid', default='{}',
+        help='JSON com listas de valores para os campos de Tuning')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch', type=int, default=25)
+    parser.add_argument('--max-time', type=float, default=180.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='tuning.jsonl')
+    args = parser.parse_args()
+
+    param_sets = expand_grid(json.loads(args.grid))
+    results = tune(param_sets, args.games, args.out, args.workers, args.batch, args.max_time, args.seed)
+    for result in results:
+        print(json.dumps({k: result[k] for k in ('params', 'games', 'survival', 'score')}))
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,21 @@
+import os
+import heapq
 import pygame
 
 from math import inf
-from typing import Tuple
-from dataclasses import dataclass
+from itertools import count
+from typing import Callable, List, Tuple
+from dataclasses import dataclass, field
 
 Vec2i = Tuple[int, int]
 
+CACHE_DIR = os.environ.get('NEORI_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'neori'))
+
+def cache_path(name: str) -> str:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
+
 def clamp(value, vmin=0, vmax=1):
     return max(vmin, min(vmax, value))
 
@@ -39,3 +49,61 @@ class Timer:
     def stop(self):
         self.pause()
         self.reset()
+
+@dataclass(order=True)
+class Event:
+    due      : float
+    order    : int
+    callback : Callable = field(compare=False)
+    cancelled: bool     = field(default=False, compare=False)
+
+    def cancel(self):
+        self.cancelled = True
+
+class Scheduler:
+    """
+    Fila de prioridade de callbacks temporizados. A cada atualização
+    só os eventos que venceram são executados, na ordem em que vencem.
+    """
+    time   : float
+    paused : bool
+    queue  : List[Event]
+
+    def __init__(self) -> None:
+        self.time = 0.0
+        self.paused = False
+        self.queue = []
+        self.counter = count()
+
+    def at(self, due: float, callback: Callable) -> Event:
+        event = Event(due, next(self.counter), callback)
+        heapq.heappush(self.queue, event)
+        return event
+
+    def after(self, delay: float, callback: Callable) -> Event:
+        return self.at(self.time + delay, callback)
+
+    def remaining(self, event: Event) -> float:
+        return max(0.0, event.due - self.time)
+
+    def update(self, dt):
+        if self.paused:
+            return
+
+        self.time += dt
+        while len(self.queue) > 0 and self.queue[0].due <= self.time:
+            event = heapq.heappop(self.queue)
+            if not event.cancelled:
+                event.callback()
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    @staticmethod
+    def cancel(events: List[Event]):
+        for event in events:
+            event.cancel()
+        events.clear()
@@ -2,7 +2,10 @@ import random
 import numpy as np
 
 from enum import IntEnum
-from neori.utils import Vec2i, clamp
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import List, Tuple
+from neori.utils import Vec2i
 
 class Cell(IntEnum):
     Dead = 0
@@ -12,12 +15,178 @@ class Cell(IntEnum):
     SpawnInfected = 4
     SpawnImmune = 5
 
+class Priority(IntEnum):
+    Spawn = 0   # anéis de spawn
+    Immune = 1  # regiões imunes do limão e das cargas
+    Snake = 2   # células limpas pela cobra
+
+LIVE = (Cell.Healthy, Cell.Infected, Cell.Immune)
+NEIGHBORS = tuple(range(9))
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    Uma regra de transição. A primeira regra que combinar com a célula
+    decide o seu próximo estado, `None` nos filtros significa "tanto faz"
+    e um `result` igual a `None` mantém a célula como está.
+    """
+    cells     : Tuple[Cell, ...]
+    result    : Cell = None
+    neighbors : Tuple[int, ...] = NEIGHBORS
+    infected  : bool = None
+    immune    : bool = None
+    healthy   : bool = None
+
+    def matches(self, cell, neighbors, infected, immune, healthy) -> bool:
+        return (cell in self.cells
+            and neighbors in self.neighbors
+            and self.infected in (None, infected)
+            and self.immune in (None, immune)
+            and self.healthy in (None, healthy))
+
+def life_rules(birth=(3,), survival=(2, 3), contagion=False) -> Tuple[Rule, ...]:
+    # células de spawn não contam como vivas, mas descontam uma vizinha
+    spawn = tuple(n + 1 for n in survival)
+    rules = [
+        # a célula nasce com a mutação adequada: imune se houver imunes
+        # e nenhuma saudável por perto, infectada se houver infectadas
+        Rule((Cell.Dead,), Cell.Immune, birth, immune=True, healthy=False),
+        Rule((Cell.Dead,), Cell.Infected, birth, infected=True),
+        Rule((Cell.Dead,), Cell.Healthy, birth),
+        Rule((Cell.SpawnImmune,)),
+        Rule((Cell.SpawnInfected,), Cell.Immune, infected=True, immune=True, healthy=False),
+        Rule((Cell.SpawnInfected,), Cell.Infected, infected=True),
+        Rule((Cell.SpawnInfected,), None, spawn),
+        Rule((Cell.SpawnInfected,), Cell.Dead),
+    ]
+
+    # células saudáveis próximas à infecção são infectadas diretamente
+    if contagion:
+        rules.append(Rule((Cell.Healthy,), Cell.Infected, survival, infected=True))
+
+    # células vivas sobrevivem com o número certo de vizinhas
+    rules.append(Rule(LIVE, None, survival))
+    rules.append(Rule(LIVE, Cell.Dead))
+    return tuple(rules)
+
+CLASSIC = life_rules()
+
+def table_index(cell, neighbors, infected, immune, healthy):
+    return (((cell * 9 + neighbors) * 2 + infected) * 2 + immune) * 2 + healthy
+
+@lru_cache
+def compile_rules(rules: Tuple[Rule, ...]) -> np.ndarray:
+    """
+    Gera uma tabela com o próximo estado para cada combinação de estado
+    da célula, vizinhas vivas e tipos de célula presentes na vizinhança.
+    """
+    table = np.zeros(len(Cell) * 9 * 8, dtype=np.int64)
+    flags = (False, True)
+
+    for cell in Cell:
+        for neighbors in NEIGHBORS:
+            for infected in flags:
+                for immune in flags:
+                    for healthy in flags:
+                        result = cell
+                        for rule in rules:
+                            if rule.matches(cell, neighbors, infected, immune, healthy):
+                                result = cell if rule.result is None else rule.result
+                                break
+
+                        index = table_index(cell, neighbors, infected, immune, healthy)
+                        table[index] = result
+
+    table.flags.writeable = False
+    return table
+
+def window_sum(mask: np.ndarray) -> np.ndarray:
+    """Soma cada vizinhança 3x3 da máscara, incluindo a própria célula."""
+    cols, rows = mask.shape
+    padded = np.pad(mask.astype(np.int8), 1)
+    total = np.zeros(mask.shape, dtype=np.int8)
+    for di in range(3):
+        for dj in range(3):
+            total += padded[di : di+cols, dj : dj+rows]
+    return total
+
+class EditBuffer:
+    """
+    Escritas no mundo acumuladas durante o tick e aplicadas de uma vez.
+    Quando duas escritas caem na mesma célula vence a de maior
+    prioridade, e entre prioridades iguais a mais recente. Isso vale
+    também entre aplicações no mesmo tick: o que já foi escrito só é
+    sobrescrito por prioridade igual ou maior, até `finish`.
+    """
+    index    : List[np.ndarray]
+    states   : List[np.ndarray]
+    priority : List[np.ndarray]
+    written  : Tuple[np.ndarray, np.ndarray]
+
+    def __init__(self) -> None:
+        self.index = []
+        self.states = []
+        self.priority = []
+        self.written = None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, index: np.ndarray, kind: Cell, priority: Priority):
+        if len(index) == 0:
+            return
+        self.index.append(index)
+        self.states.append(np.full(len(index), kind, dtype=np.int64))
+        self.priority.append(np.full(len(index), priority, dtype=np.int8))
+
+    def apply(self, *grids: np.ndarray):
+        if len(self.index) == 0:
+            return
+
+        # as escritas anteriores do tick entram primeiro, sem estado:
+        # se uma delas vencer, a célula fica como está
+        index, states, priority = self.index, self.states, self.priority
+        if self.written is not None:
+            written, level = self.written
+            index = [written] + index
+            states = [np.full(len(written), -1, dtype=np.int64)] + states
+            priority = [level] + priority
+
+        index = np.concatenate(index)
+        states = np.concatenate(states)
+        priority = np.concatenate(priority)
+        order = np.arange(len(index))
+
+        # ordena por célula, prioridade e ordem, e fica com a última de cada célula
+        sort = np.lexsort((order, priority, index))
+        index, states, priority = index[sort], states[sort], priority[sort]
+        last = np.append(index[1:] != index[:-1], True)
+        index, states, priority = index[last], states[last], priority[last]
+
+        new = states >= 0
+        for grid in grids:
+            grid.flat[index[new]] = states[new]
+        self.written = index, priority
+        self.index, self.states, self.priority = [], [], []
+
+    def finish(self):
+        """Fecha o tick, as próximas escritas não disputam com as anteriores."""
+        self.written = None
+
+    def clear(self):
+        self.index.clear()
+        self.states.clear()
+        self.priority.clear()
+        self.written = None
+
 class WorldGrid:
-    res  : int
-    cols : int
-    rows : int
-    curr : np.ndarray
-    next : np.ndarray
+    res   : int
+    cols  : int
+    rows  : int
+    curr  : np.ndarray
+    next  : np.ndarray
+    table : np.ndarray
+    edits : EditBuffer
 
     @property
     def size(self) -> Vec2i:
@@ -35,54 +204,45 @@ class WorldGrid:
     def cell_count(self):
         return np.bincount(self.curr.flatten(), minlength=6)
 
-    def __init__(self, width, height, res) -> None:
+    def __init__(self, width, height, res, rules=CLASSIC) -> None:
         self.res  = res
         self.cols = width // self.res
         self.rows = height // self.res
         self.curr = np.random.randint(2, size=self.size)
         self.next = np.zeros((self.cols, self.rows), dtype=np.int64)
+        self.table = compile_rules(rules)
+        self.edits = EditBuffer()
 
-    def update_at(self, i: int, j: int):
-        cell = self.curr[i, j]
-        cells = self.curr[max(0, i-1) : i+2, max(0, j-1) : j+2].flatten()
-        mutation = Cell.Healthy
-        count = np.bincount(cells, minlength=6)
+    def reset(self):
+        self.curr[...] = np.random.randint(2, size=self.size)
+        self.next[...] = 0
+        self.edits.clear()
 
-        # quantas celulas de cada tipo
-        healthy = count[Cell.Healthy]
-        immune = count[Cell.Immune]
-        infected = count[Cell.Infected]
-        neighbors = np.count_nonzero(cells) - clamp(cell)
+    def step(self, keep: np.ndarray = None):
+        """
+        Calcula a próxima geração de todas as células de uma vez, exceto
+        as marcadas em `keep`, que continuam com o estado atual.
+        """
+        curr = self.curr
+        live = (curr >= Cell.Healthy) & (curr <= Cell.Immune)
+        neighbors = window_sum(live) - live
 
-        neighbors -= count[Cell.SpawnImmune]
-        neighbors -= count[Cell.SpawnInfected]
+        infected = window_sum(curr == Cell.Infected) > 0
+        immune = window_sum(curr == Cell.Immune) > 0
+        healthy = window_sum(curr == Cell.Healthy) > 0
 
-        # infecta a célula se ela estiver próxima à uma célula infectada
-        if infected > 0:
-            mutation = Cell.Infected
+        index = table_index(curr, neighbors, infected, immune, healthy)
+        self.next = self.table[index]
 
-        if immune > 0 and healthy == 0:
-            mutation = Cell.Immune
+        if keep is not None:
+            self.next[keep] = curr[keep]
 
-        if cell == Cell.SpawnImmune:
-            pass
+    def apply_edits(self):
+        """Escreve as edições pendentes na geração atual e na próxima."""
+        self.edits.apply(self.curr, self.next)
 
-        elif cell == Cell.SpawnInfected and infected > 0:
-            self.next[i, j] = mutation
-
-        # se a célula estiver morta e tiver mais de 3 células
-        # vizinhas viva ela renascerá com a mutação adequada
-        elif cell == Cell.Dead and neighbors == 3:
-            self.next[i, j] = mutation
-
-        # se a célula estiver viva e tiver menos de 2 ou mais de 3
-        # células vizinhas vivas ela morrerá
-        elif cell > 0 and (neighbors < 2 or neighbors > 3):
-            self.next[i, j] = Cell.Dead
-
-        # caso contrário, a célula continuará como está
-        else:
-            self.next[i, j] = self.curr[i, j]
+    def finish_edits(self):
+        self.edits.finish()
 
     def update(self):
         self.curr = self.next.copy()
@@ -92,38 +252,33 @@ class WorldGrid:
         j = random.randint(0, self.rows-1)
         return i, j
 
-    def set_cell(self, i: int, j: int, kind: Cell):
-            self.curr[i, j] = kind
-            self.next[i, j] = kind
-
-    def set_square_region(self, i: int, j: int, kind: Cell, size=2):
-        for n in self.slice_col(i, size):
-            for m in self.slice_row(j, size):
-                self.set_cell(n, m, kind)
-
-    def set_circular_region(self, i: int, j: int, kind: Cell, size=2):
-        r = size*size
-        for n in self.slice_col(i, size):
-            di = n - i
-            for m in self.slice_row(j, size):
-                dj = m - j
-                if di*di + dj*dj <= r:
-                    self.set_cell(n, m, kind)
-
-    def set_circular_ring(self, i: int, j: int, kind: Cell, size=2, th=1):
-        r, k = size**2, (size-th)**2
-        for n in self.slice_col(i, size):
-            di = n - i
-            for m in self.slice_row(j, size):
-                dj = m - j
-                if k <= di*di + dj*dj <= r:
-                    self.set_cell(n, m, kind)
-
-    def slice_row(self, i: int, size: int = 2):
-        return range(max(0, i-size), min(i+size+1, self.rows))
-
-    def slice_col(self, j: int, size: int = 2):
-        return range(max(0, j-size), min(j+size+1, self.cols))
+    def region(self, i: int, j: int, size: int):
+        # janela ao redor de (i, j) e a distância ao quadrado até o centro
+        cols = np.arange(max(0, i-size), min(i+size+1, self.cols))
+        rows = np.arange(max(0, j-size), min(j+size+1, self.rows))
+        di = cols[:, None] - i
+        dj = rows[None, :] - j
+        return cols, rows, di*di + dj*dj
+
+    def set_mask(self, cols, rows, mask, kind: Cell, priority: Priority):
+        n, m = np.nonzero(mask)
+        self.edits.add(cols[n] * self.rows + rows[m], kind, priority)
+
+    def set_cell(self, i: int, j: int, kind: Cell, priority=Priority.Spawn):
+        if 0 <= i < self.cols and 0 <= j < self.rows:
+            self.edits.add(np.array([i * self.rows + j]), kind, priority)
+
+    def set_square_region(self, i: int, j: int, kind: Cell, size=2, priority=Priority.Spawn):
+        cols, rows, dist = self.region(i, j, size)
+        self.set_mask(cols, rows, dist >= 0, kind, priority)
+
+    def set_circular_region(self, i: int, j: int, kind: Cell, size=2, priority=Priority.Spawn):
+        cols, rows, dist = self.region(i, j, size)
+        self.set_mask(cols, rows, dist <= size*size, kind, priority)
+
+    def set_circular_ring(self, i: int, j: int, kind: Cell, size=2, th=1, priority=Priority.Spawn):
+        cols, rows, dist = self.region(i, j, size)
+        self.set_mask(cols, rows, ((size-th)**2 <= dist) & (dist <= size**2), kind, priority)
 
     def infect(self, i = -1, j = -1):
         i = i if i > -1 else random.randint(4, self.cols-3)
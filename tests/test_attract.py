@@ -0,0 +1,84 @@
+import numpy as np
+
+from neori.attract import AttractLoop
+
+def record(loop: AttractLoop, grids):
+    for grid in grids:
+        if loop.closing is not None:
+            break
+        loop.record(grid)
+    loop.closing.join()
+    assert loop.ready
+
+def play(path, count):
+    loop = AttractLoop(str(path))
+    assert loop.ready
+    return loop, [loop.next().copy() for _ in range(count)]
+
+def random_grids(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 3, size=(20, 12)).astype(np.uint8) for _ in range(count)]
+
+def test_exact_cycle(tmp_path):
+    path = tmp_path / 'cycle.nf'
+    cycle = random_grids(40)
+    record(AttractLoop(str(path), min_loop=30), random_grids(10, 1) + cycle * 3)
+
+    loop, shown = play(path, 150)
+    assert (loop.start, loop.blend, len(loop.frames)) == (10, 0, 50)
+    for k, grid in enumerate(shown[10:]):
+        assert np.array_equal(grid, cycle[k % 40])
+
+def test_still_world_is_a_one_frame_loop(tmp_path):
+    path = tmp_path / 'still.nf'
+    still = np.zeros((20, 12), dtype=np.uint8)
+    still[4:6, 4:6] = 1
+    record(AttractLoop(str(path), min_loop=30), random_grids(10) + [still] * 100)
+
+    loop, shown = play(path, 60)
+    assert len(loop.frames) - loop.start == 1
+    assert all(np.array_equal(grid, still) for grid in shown[10:])
+
+def test_seam_fades_into_the_loop_start(tmp_path):
+    path = tmp_path / 'seam.nf'
+    grids = random_grids(120, 2)
+    record(AttractLoop(str(path), max_frames=120, min_loop=40, fade=8), grids)
+
+    loop, shown = play(path, 400)
+    end, start, blend = len(loop.frames), loop.start, loop.blend
+    assert blend == 8 and start >= blend and end - start >= 40
+
+    # fora da transição os quadros são os gravados, e a volta cai em `start`
+    for i in range(end - blend):
+        assert np.array_equal(shown[i], grids[i])
+    assert np.array_equal(shown[end], grids[start])
+
+    # no último quadro da transição quase todas as células já são do começo
+    last = shown[end - 1]
+    assert np.count_nonzero(last == grids[start - 1]) > np.count_nonzero(last == grids[end - 1])
+
+    # as passadas seguintes se repetem
+    period = end - start
+    for k in range(period):
+        assert np.array_equal(shown[end + k], shown[end + period + k])
+
+def test_restart_drops_the_partial_recording(tmp_path):
+    path = tmp_path / 'restart.nf'
+    loop = AttractLoop(str(path), min_loop=30)
+
+    # metade de um ciclo, depois um mundo novo: o ciclo antigo não fecha
+    cycle = random_grids(40)
+    for grid in cycle[:20]:
+        loop.record(grid)
+    loop.restart()
+    assert (loop.grids, loop.seen, loop.period, loop.repeats) == ([], {}, 0, 0)
+
+    fresh = random_grids(10, 1)
+    record(loop, fresh + cycle * 3)
+    loop, shown = play(path, 60)
+    assert (loop.start, len(loop.frames)) == (10, 50)
+    assert all(np.array_equal(a, b) for a, b in zip(shown[:10], fresh))
+
+    # depois de pronto não há o que recomeçar
+    loop.restart()
+    assert loop.ready
@@ -0,0 +1,48 @@
+import numpy as np
+
+from collections import deque
+from neori.bots import DIRECTIONS, INF, FlowField
+
+def bfs(targets: np.ndarray, obstacles: np.ndarray) -> np.ndarray:
+    dist = np.full(targets.shape, INF, dtype=np.int64)
+    queue = deque()
+    for cell in zip(*np.nonzero(targets & ~obstacles)):
+        dist[cell] = 0
+        queue.append(cell)
+
+    while queue:
+        i, j = queue.popleft()
+        for di, dj in DIRECTIONS:
+            n, m = i + di, j + dj
+            if 0 <= n < targets.shape[0] and 0 <= m < targets.shape[1]:
+                if not obstacles[n, m] and dist[n, m] == INF:
+                    dist[n, m] = dist[i, j] + 1
+                    queue.append((n, m))
+    return dist
+
+def test_incremental_update_matches_full_bfs():
+    rng = np.random.default_rng(1)
+    field = FlowField(40, 30)
+    targets = rng.random((40, 30)) < 0.01
+    obstacles = rng.random((40, 30)) < 0.2
+
+    for _ in range(200):
+        targets = targets ^ (rng.random(targets.shape) < 0.005)
+        obstacles = obstacles ^ (rng.random(obstacles.shape) < 0.02)
+        field.update(targets.copy(), obstacles.copy())
+
+        free = ~obstacles
+        assert np.array_equal(field.dist[free], bfs(targets, obstacles)[free])
+
+def test_direction_goes_downhill():
+    field = FlowField(10, 8)
+    targets = np.zeros((10, 8), dtype=bool)
+    targets[7, 2] = True
+    obstacles = np.zeros((10, 8), dtype=bool)
+    obstacles[4, :6] = True
+    field.update(targets, obstacles)
+
+    for cell in [(0, 0), (2, 7), (9, 7)]:
+        di, dj = field.direction(cell)
+        assert field.dist[cell[0] + di, cell[1] + dj] == field.dist[cell] - 1
+    assert field.direction((-1, 0)) is None
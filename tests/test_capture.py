@@ -0,0 +1,85 @@
+import os
+import threading
+import random
+import numpy as np
+import pygame
+import pytest
+
+from neori.capture import Recorder, read_frames
+from neori.simulation import GameState, Simulation
+
+def make_simulation(seed=0) -> Simulation:
+    random.seed(seed)
+    np.random.seed(seed)
+    return Simulation(GameState(300, 150, 15))
+
+def stop_within(recorder: Recorder, timeout=5.0):
+    stopper = threading.Thread(target=recorder.stop, daemon=True)
+    stopper.start()
+    stopper.join(timeout)
+    assert not stopper.is_alive()
+
+def test_raw_recording_round_trip(tmp_path):
+    path = str(tmp_path / 'partida.nf')
+    sim = make_simulation()
+    recorder = Recorder(path, size=256)
+
+    sim.state.snake.change_dir((1, 0))
+    grids, bodies = [], []
+    for _ in range(8):
+        sim.update(1 / 15)
+        recorder.capture(sim.state)
+        grids.append(sim.state.world.curr.copy())
+        bodies.append(list(sim.state.snake.body))
+    stop_within(recorder)
+
+    assert recorder.error is None
+    assert (recorder.frames, recorder.dropped) == (8, 0)
+    assert recorder.bytes_written == os.path.getsize(path)
+    decoded = 0
+    for grid, body, decoder in zip(grids, bodies, read_frames(path)):
+        assert np.array_equal(decoder.curr, grid)
+        assert decoder.body == body
+        decoded += 1
+    assert decoded == 8
+
+def test_png_recording(tmp_path):
+    path = tmp_path / 'quadros'
+    sim = make_simulation(1)
+    recorder = Recorder(str(path), size=16, scale=2)
+
+    for _ in range(5):
+        sim.update(1 / 15)
+        recorder.capture(sim.state)
+    stop_within(recorder)
+
+    assert recorder.error is None
+    assert sorted(os.listdir(path)) == [f'{tick:06d}.png' for tick in range(5)]
+    image = pygame.image.load(str(path / '000004.png'))
+    assert image.get_size() == (sim.state.world.cols * 2, sim.state.world.rows * 2)
+
+def test_bad_path_fails_immediately(tmp_path):
+    with pytest.raises(OSError):
+        Recorder(str(tmp_path / 'nada' / 'partida.nf'))
+
+def test_failed_worker_does_not_hang_stop(tmp_path):
+    sim = make_simulation(2)
+    recorder = Recorder(str(tmp_path / 'quadros'), size=2)
+
+    def broken(*args):
+        raise OSError('disco cheio')
+    recorder.draw = broken
+
+    # a thread morre no primeiro quadro e a fila enche
+    for _ in range(10):
+        sim.update(1 / 15)
+        recorder.capture(sim.state)
+    recorder.thread.join(5.0)
+    for _ in range(10):
+        recorder.capture(sim.state)
+    stop_within(recorder)
+
+    assert isinstance(recorder.error, OSError)
+    assert recorder.frames == 0
+    assert recorder.dropped > 0
+    assert 'disco cheio' in recorder.report()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from collections import deque
+from neori.clusters import ClusterMap
+from neori.world import Cell, WorldGrid
+
+def components(mask: np.ndarray):
+    seen = np.zeros_like(mask)
+    found = []
+    for start in zip(*np.nonzero(mask)):
+        if seen[start]:
+            continue
+
+        seen[start] = True
+        queue, cells = deque([start]), []
+        while queue:
+            i, j = queue.popleft()
+            cells.append((i, j))
+            for n, m in ((i+1, j), (i-1, j), (i, j+1), (i, j-1)):
+                if 0 <= n < mask.shape[0] and 0 <= m < mask.shape[1] and mask[n, m] and not seen[n, m]:
+                    seen[n, m] = True
+                    queue.append((n, m))
+        found.append(np.array(cells))
+    return found
+
+def assert_matches(clusters: ClusterMap, mask: np.ndarray):
+    expected = components(mask)
+    assert clusters.count == len(expected)
+
+    # os focos saem do maior para o menor
+    sizes = clusters.clusters['size']
+    assert np.all(sizes[:-1] >= sizes[1:])
+
+    for cells in expected:
+        k = clusters.cluster_at(*cells[0])
+        cluster = clusters.clusters[k]
+        assert all(clusters.cluster_at(i, j) == k for i, j in cells)
+        assert cluster['size'] == len(cells)
+        assert (cluster['min_col'], cluster['min_row']) == tuple(cells.min(axis=0))
+        assert (cluster['max_col'], cluster['max_row']) == tuple(cells.max(axis=0))
+        assert cluster['col'] == pytest.approx(cells[:, 0].mean(), rel=1e-5)
+        assert cluster['row'] == pytest.approx(cells[:, 1].mean(), rel=1e-5)
+
+# mundos que não são múltiplos do bloco, a última linha de blocos passa da borda
+@pytest.mark.parametrize('cols, rows, tile', [(23, 17, 5), (40, 30, 8), (33, 9, 16), (16, 16, 16)])
+def test_incremental_labels_match_flood_fill(cols, rows, tile):
+    rng = np.random.default_rng(cols * rows + tile)
+    world = WorldGrid(cols, rows, 1)
+    clusters = ClusterMap(world, tile)
+    infected = rng.random(world.size) < 0.4
+
+    for _ in range(40):
+        # poucas mudanças por tick, para só alguns blocos serem refeitos
+        infected ^= rng.random(world.size) < 0.03
+        world.curr = np.where(infected, Cell.Infected, Cell.Healthy)
+        clusters.update()
+        assert_matches(clusters, infected)
+
+def test_empty_world_and_distance():
+    world = WorldGrid(20, 20, 1)
+    world.curr[...] = Cell.Dead
+    clusters = ClusterMap(world, 8)
+    clusters.update()
+    assert clusters.count == 0
+    assert clusters.largest is None
+    assert clusters.distance(3, 3) == float('inf')
+
+    world.curr[10:13, 10:12] = Cell.Infected
+    clusters.update()
+    assert clusters.count == 1
+    assert clusters.largest['size'] == 6
+    assert clusters.distance(11, 11) == 0
+    assert clusters.distance(10, 4) == 6
@@ -0,0 +1,78 @@
+from neori.governor import Governor
+
+def frame(governor: Governor, update_cost: float, render_cost: float, ticks=1, dropped=0):
+    # como no laço do jogo, só há custo de renderização nos quadros desenhados
+    rendered = governor.should_render()
+    governor.measure(update_cost, render_cost if rendered else None, ticks, dropped)
+    return rendered
+
+def test_heavy_frames_degrade_one_level_at_a_time():
+    governor = Governor(100)
+    changes = []
+    for k in range(200):
+        level = governor.level
+        frame(governor, 0.008, 0.010)
+        if governor.level != level:
+            changes.append(k)
+
+    top = len(Governor.levels) - 1
+    assert governor.level == top
+    assert governor.metrics['degraded'] == top
+    assert governor.metrics['restored'] == 0
+
+    # depois de cada troca, `settle` quadros são ignorados
+    assert len(changes) == top
+    assert all(b - a > Governor.settle for a, b in zip(changes, changes[1:]))
+
+def test_degradation_stops_at_the_first_level_that_fits():
+    governor = Governor(100)
+    for _ in range(200):
+        frame(governor, 0.005, 0.010)
+
+    # renderizando um a cada 3 quadros a carga fica em 0.83
+    assert governor.level == 3
+    assert governor.low < governor.load < governor.high
+    assert governor.metrics['degraded'] == 3
+
+def test_light_frames_restore_after_patience():
+    governor = Governor(100)
+    governor.change(2)
+
+    for _ in range(Governor.settle + Governor.patience - 1):
+        frame(governor, 0.001, 0.001)
+    assert governor.level == 2
+
+    frame(governor, 0.001, 0.001)
+    assert governor.level == 1
+    assert governor.metrics['restored'] == 1
+    assert governor.metrics['degraded'] == 0
+
+def test_load_between_thresholds_keeps_the_level():
+    governor = Governor(100)
+    governor.change(1)
+    for _ in range(300):
+        frame(governor, 0.007, 0.0)
+    assert 0.5 < governor.load < 0.9
+    assert governor.level == 1
+
+    # um quadro no meio da faixa zera a paciência
+    governor.update_cost = 0.0
+    for k in range(Governor.patience * 3):
+        frame(governor, 0.001 if k % 20 else 0.03, 0.0)
+    assert governor.level == 1
+    assert governor.metrics['restored'] == 0
+
+def test_metrics_count_frames_ticks_and_skips():
+    governor = Governor(100)
+    governor.change(3)
+    every = governor.render_every
+
+    rendered = sum(frame(governor, 0.005, 0.02, ticks=2, dropped=1) for _ in range(9))
+    metrics = governor.metrics
+    assert rendered == 9 // every
+    assert metrics['frames'] == 9
+    assert metrics['rendered'] == rendered
+    assert metrics['skipped'] == 9 - rendered
+    assert (metrics['ticks'], metrics['dropped_ticks']) == (18, 9)
+    assert governor.frames == [0, 0, 0, 9, 0]
+    assert 'frames/level=[0 0 0 9 0]' in governor.report()
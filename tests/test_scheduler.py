@@ -0,0 +1,49 @@
+from neori.utils import Scheduler
+
+def test_events_run_in_due_order():
+    clock = Scheduler()
+    calls = []
+    clock.after(2, lambda: calls.append('b'))
+    clock.after(1, lambda: calls.append('a'))
+    clock.after(2, lambda: calls.append('c'))
+    clock.after(5, lambda: calls.append('d'))
+
+    clock.update(0.5)
+    assert calls == []
+    clock.update(2)
+    assert calls == ['a', 'b', 'c']
+    assert clock.remaining(clock.queue[0]) == 2.5
+
+def test_cancelled_events_do_not_run():
+    clock = Scheduler()
+    calls = []
+    events = [clock.after(1, lambda: calls.append('a')), clock.after(1, lambda: calls.append('b'))]
+    events[0].cancel()
+    clock.update(1)
+    assert calls == ['b']
+
+    events = [clock.after(1, lambda: calls.append('c'))]
+    Scheduler.cancel(events)
+    assert events == []
+    clock.update(1)
+    assert calls == ['b']
+
+def test_paused_clock_does_not_advance():
+    clock = Scheduler()
+    calls = []
+    clock.after(1, lambda: calls.append('a'))
+
+    clock.pause()
+    clock.update(5)
+    assert clock.time == 0 and calls == []
+
+    clock.resume()
+    clock.update(1)
+    assert calls == ['a']
+
+def test_callbacks_can_schedule_more_events():
+    clock = Scheduler()
+    calls = []
+    clock.after(1, lambda: clock.after(0, lambda: calls.append('again')))
+    clock.update(1)
+    assert calls == ['again']
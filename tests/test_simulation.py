@@ -0,0 +1,170 @@
+import random
+import numpy as np
+
+from neori.food import Food, Fruit
+from neori.simulation import GameState, Simulation
+from neori.snake import Snake
+from neori.world import Cell, Priority
+
+def make_simulation(seed=0) -> Simulation:
+    random.seed(seed)
+    np.random.seed(seed)
+    sim = Simulation(GameState(300, 300, 15))
+    sim.state.world.curr[...] = Cell.Dead
+    sim.state.world.next[...] = Cell.Dead
+    return sim
+
+def test_cleared_cells_do_not_infect_in_the_same_tick():
+    sim = make_simulation()
+    world = sim.state.world
+
+    # a cobra come a célula em (5, 4) e limpa o quadrado ao redor,
+    # que contém a linha infectada (7, 3..5); sem ela (8, 4) não nasce
+    sim.state.snake = Snake(5, 4)
+    world.curr[5, 4] = Cell.Infected
+    world.curr[7, 3:6] = Cell.Infected
+
+    sim.update(1 / 15)
+    assert world.curr[8, 4] == Cell.Dead
+    assert np.count_nonzero(world.curr == Cell.Infected) == 0
+
+def test_spawn_rings_appear_in_the_same_tick():
+    sim = make_simulation()
+    world = sim.state.world
+    sim.state.snake = Snake(0, 0)
+    sim.state.spawns = [(10, 10)]
+    sim.events.radius = 3
+
+    sim.update_world()
+    assert world.curr[13, 10] == Cell.SpawnInfected
+    assert world.next[13, 10] == Cell.SpawnInfected
+    assert world.curr[10, 10] == Cell.Dead
+
+def test_spawn_rings_do_not_overwrite_immune_regions():
+    sim = make_simulation()
+    world = sim.state.world
+    sim.state.snake = Snake(0, 0)
+    sim.state.spawns = [(10, 10)]
+    sim.events.radius = 3
+
+    world.set_circular_region(13, 10, Cell.SpawnImmune, 2, Priority.Immune)
+    sim.update_world()
+    assert world.curr[13, 10] == Cell.SpawnImmune
+    assert world.curr[10, 13] == Cell.SpawnInfected
+
+# passo exato em ponto flutuante, os tempos do ciclo caem em ticks inteiros
+DT = 1 / 32
+
+def run(sim: Simulation, seconds: float):
+    for _ in range(round(seconds / DT)):
+        sim.update(DT)
+
+def test_infection_cycle_timings():
+    sim = make_simulation()
+    sim.state.snake = Snake(0, 0)
+    tuning = sim.tuning
+
+    run(sim, tuning.infection_delay - DT)
+    assert sim.events.radius == 0 and sim.state.spawns == []
+    run(sim, DT)
+    assert sim.events.radius == 1 and len(sim.state.spawns) > 0
+
+    # o raio cresce um a cada meio segundo até 8
+    for radius in range(2, 9):
+        run(sim, 0.5 - DT)
+        assert sim.events.radius == radius - 1
+        run(sim, DT)
+        assert sim.events.radius == radius
+
+    # a liberação transforma os anéis em infecção e recomeça o ciclo
+    run(sim, tuning.infection_time - sim.events.world.time - DT)
+    world = sim.state.world
+    rings = np.count_nonzero(world.curr == Cell.SpawnInfected)
+    assert rings > 0 and sim.events.radius == 8
+    run(sim, DT)
+    assert sim.events.world.time == tuning.infection_time
+    assert sim.events.cycle_time == tuning.infection_time
+    assert sim.events.radius == 0 and sim.state.spawns == []
+    assert np.count_nonzero(world.curr == Cell.SpawnInfected) == 0
+
+def add_blocks(sim: Simulation, count: int, row: int):
+    # blocos 2x2, que as regras mantêm parados
+    for k in range(count):
+        sim.state.world.curr[4*k + 2 : 4*k + 4, row : row+2] = Cell.Infected
+
+def test_fast_burst_holds_the_infection_cycle():
+    sim = make_simulation()
+    sim.state.snake = Snake(0, 0)
+    tuning = sim.tuning
+
+    # um surto logo no começo do ciclo o segura
+    run(sim, 0.5)
+    add_blocks(sim, 3, 12)
+    run(sim, DT)
+    assert sim.state.infections >= tuning.infection_burst
+    assert sim.events.held and sim.events.infection == []
+
+    # sem novo crescimento, o ciclo recomeça do zero
+    run(sim, DT)
+    assert not sim.events.held
+    assert sim.events.cycle_time == sim.events.world.time
+
+    # depois de `infection_hold` segundos, o mesmo surto não segura
+    run(sim, tuning.infection_hold + DT)
+    add_blocks(sim, 3, 12)
+    run(sim, DT)
+    assert not sim.events.held and len(sim.events.infection) > 0
+
+def test_foods_respawn_after_all_are_eaten():
+    sim = make_simulation()
+    sim.state.snake = Snake(0, 0)
+    tuning = sim.tuning
+
+    run(sim, tuning.food_delay)
+    foods = sim.state.foods
+    assert len(foods) > 0 and sim.events.food_time == tuning.food_delay
+
+    # a cobra come a última fruta logo depois de ela aparecer
+    foods[:] = [Food(*sim.state.snake.head, type=Fruit.Apple)]
+    run(sim, DT)
+    assert foods == []
+    assert sim.events.food.due == sim.events.food_time + tuning.food_delay
+
+    run(sim, tuning.food_delay - 2*DT)
+    assert foods == []
+    run(sim, DT)
+    assert len(foods) > 0
+
+    # comidas mais tarde, voltam no mesmo tick
+    run(sim, 3)
+    foods[:] = [Food(*sim.state.snake.head, type=Fruit.Apple)]
+    sim.update_foods()
+    assert sim.events.food.due == sim.events.world.time
+
+def test_world_clock_stops_while_frozen():
+    sim = make_simulation()
+    sim.state.snake = Snake(0, 0)
+    sim.state.world.curr[4:6, 4:7] = Cell.Healthy
+
+    run(sim, 1)
+    sim.freeze()
+    frozen = sim.state.world.curr.copy()
+    run(sim, sim.tuning.frozen_time - DT)
+    assert sim.state.is_frozen
+    assert sim.events.world.time == 1
+    assert np.array_equal(sim.state.world.curr, frozen)
+
+    # os efeitos continuam, e o congelamento acaba sozinho
+    run(sim, DT)
+    assert not sim.state.is_frozen
+    assert sim.events.world.time == 1 + DT
+
+def test_threat_uses_the_live_count_of_the_tick():
+    sim = make_simulation()
+    sim.state.snake = Snake(0, 0)
+    add_blocks(sim, 2, 12)
+    sim.state.world.curr[10:12, 2:4] = Cell.Healthy
+
+    sim.update(DT)
+    assert sim.state.live == 12
+    assert sim.threat() == 4 / 12
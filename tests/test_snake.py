@@ -0,0 +1,53 @@
+from neori.snake import Snake, TurnQueue
+
+def moving_right() -> Snake:
+    snake = Snake(5, 5)
+    snake.change_dir((1, 0))
+    return snake
+
+def test_quick_turns_are_kept_in_order():
+    snake = moving_right()
+    turns = TurnQueue()
+
+    # cima e esquerda entre dois ticks viram duas curvas, não uma reversão
+    assert turns.push(snake, (0, -1), 1.0)
+    assert turns.push(snake, (-1, 0), 2.0)
+
+    assert turns.pop(snake) == 1.0
+    snake.update()
+    assert snake.dir == (0, -1) and snake.head == (5, 4)
+
+    assert turns.pop(snake) == 2.0
+    snake.update()
+    assert snake.dir == (-1, 0) and snake.head == (4, 4)
+
+def test_reversal_of_the_last_queued_turn_is_rejected():
+    snake = moving_right()
+    turns = TurnQueue()
+
+    assert not turns.push(snake, (-1, 0), 1.0)
+    assert not turns.push(snake, (1, 0), 1.0)
+    assert turns.push(snake, (0, 1), 1.0)
+    assert not turns.push(snake, (0, -1), 2.0)
+    assert not turns.push(snake, (0, 1), 2.0)
+    assert len(turns.turns) == 1
+
+def test_queue_is_capped():
+    snake = moving_right()
+    turns = TurnQueue()
+    for k, new_dir in enumerate([(0, 1), (-1, 0), (0, -1), (1, 0)]):
+        assert turns.push(snake, new_dir, k) == (k < TurnQueue.size)
+    assert len(turns.turns) == TurnQueue.size
+
+    turns.clear()
+    assert turns.pop(snake) is None
+
+def test_one_turn_per_tick():
+    snake = moving_right()
+    turns = TurnQueue()
+    turns.push(snake, (0, 1), 1.0)
+    turns.push(snake, (-1, 0), 2.0)
+
+    turns.pop(snake)
+    assert snake.dir == (0, 1)
+    assert len(turns.turns) == 1
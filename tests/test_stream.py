@@ -0,0 +1,133 @@
+import random
+import socket
+import numpy as np
+
+from neori.simulation import GameState, Simulation
+from neori.stream import COUNT, DELTA, KEYFRAME, FrameDecoder, FrameEncoder, FrameStream
+
+def make_simulation(seed=0) -> Simulation:
+    random.seed(seed)
+    np.random.seed(seed)
+    return Simulation(GameState(600, 300, 15))
+
+def assert_decoded(decoder: FrameDecoder, state):
+    assert np.array_equal(decoder.curr, state.world.curr)
+    assert decoder.body == list(state.snake.body)
+    assert decoder.foods == [(*food.pos, int(food.type)) for food in state.foods]
+
+def test_round_trip():
+    sim = make_simulation()
+    sim.state.snake.change_dir((1, 0))
+    encoder = FrameEncoder(interval=20)
+    decoder = FrameDecoder()
+
+    for tick in range(120):
+        sim.update(1 / 15)
+        if sim.state.game_over:
+            sim.reset()
+            sim.state.snake.change_dir((1, 0))
+        if tick % 7 == 0:
+            sim.state.snake.grow()
+
+        decoder.decode(encoder.encode(sim.state))
+        assert decoder.tick == tick
+        assert_decoded(decoder, sim.state)
+
+def read_available(sock: socket.socket, buffer: bytearray, decoder: FrameDecoder):
+    kinds = []
+    while True:
+        try:
+            chunk = sock.recv(65536)
+        except BlockingIOError:
+            break
+        buffer += chunk
+
+    while len(buffer) >= COUNT.size:
+        size, = COUNT.unpack_from(buffer)
+        if len(buffer) < COUNT.size + size:
+            break
+        frame = bytes(buffer[COUNT.size : COUNT.size+size])
+        decoder.decode(frame)
+        kinds.append(frame[2])
+        del buffer[:COUNT.size+size]
+    return kinds
+
+def test_slow_spectator_resyncs_without_blocking():
+    sim = make_simulation(1)
+    sender, receiver = socket.socketpair()
+    sender.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    receiver.setblocking(False)
+
+    stream = FrameStream(interval=1000, limit=8 * 1024)
+    stream.add(sender)
+
+    # o espectador não lê nada, o jogo continua e os quadros são descartados
+    for _ in range(60):
+        sim.update(1 / 15)
+        stream.push(sim.state)
+    assert stream.dropped > 0
+    assert not stream.outputs[0].synced
+
+    # quando volta a ler, recebe um quadro chave e fica em dia
+    decoder, buffer = FrameDecoder(), bytearray()
+    for _ in range(20):
+        read_available(receiver, buffer, decoder)
+        sim.update(1 / 15)
+        stream.push(sim.state)
+    read_available(receiver, buffer, decoder)
+
+    assert stream.outputs[0].synced
+    assert_decoded(decoder, sim.state)
+
+def test_slow_spectator_does_not_force_keyframes_on_others():
+    sim = make_simulation(3)
+    slow, slow_end = socket.socketpair()
+    slow.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    slow_end.setblocking(False)
+    healthy, healthy_end = socket.socketpair()
+    healthy_end.setblocking(False)
+
+    stream = FrameStream(interval=1000, limit=8 * 1024)
+    stream.add(healthy)
+    sim.update(1 / 15)
+    stream.push(sim.state)
+    stream.add(slow)
+
+    decoder, buffer = FrameDecoder(), bytearray()
+    kinds = read_available(healthy_end, buffer, decoder)
+    for _ in range(60):
+        sim.update(1 / 15)
+        stream.push(sim.state)
+        kinds += read_available(healthy_end, buffer, decoder)
+        assert_decoded(decoder, sim.state)
+    assert stream.dropped > 0
+    assert not stream.outputs[1].synced
+
+    # o lento volta com um quadro chave só dele, o outro segue com deltas
+    slow_decoder, slow_buffer = FrameDecoder(), bytearray()
+    read_available(slow_end, slow_buffer, slow_decoder)
+    slow_kinds = []
+    for _ in range(20):
+        sim.update(1 / 15)
+        stream.push(sim.state)
+        kinds += read_available(healthy_end, buffer, decoder)
+        slow_kinds += read_available(slow_end, slow_buffer, slow_decoder)
+
+    assert stream.outputs[1].synced
+    assert_decoded(slow_decoder, sim.state)
+    assert_decoded(decoder, sim.state)
+    assert KEYFRAME in slow_kinds
+    assert kinds == [KEYFRAME] + [DELTA] * 80
+
+def test_stalled_spectator_is_removed():
+    sim = make_simulation(2)
+    sender, receiver = socket.socketpair()
+    sender.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    stream = FrameStream(limit=8 * 1024, patience=5)
+    stream.add(sender)
+
+    for _ in range(30):
+        sim.update(1 / 15)
+        stream.push(sim.state)
+    assert stream.outputs == []
+    receiver.close()
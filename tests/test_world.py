@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from neori.utils import clamp
+from neori.world import Cell, Priority, WorldGrid
+
+def old_update_at(curr: np.ndarray, next: np.ndarray, i: int, j: int):
+    # cópia congelada de `WorldGrid.update_at`, antes da tabela de regras
+    cell = curr[i, j]
+    cells = curr[max(0, i-1) : i+2, max(0, j-1) : j+2].flatten()
+    mutation = Cell.Healthy
+    count = np.bincount(cells, minlength=6)
+
+    healthy = count[Cell.Healthy]
+    immune = count[Cell.Immune]
+    infected = count[Cell.Infected]
+    neighbors = np.count_nonzero(cells) - clamp(cell)
+
+    neighbors -= count[Cell.SpawnImmune]
+    neighbors -= count[Cell.SpawnInfected]
+
+    if infected > 0:
+        mutation = Cell.Infected
+
+    if immune > 0 and healthy == 0:
+        mutation = Cell.Immune
+
+    if cell == Cell.SpawnImmune:
+        pass
+
+    elif cell == Cell.SpawnInfected and infected > 0:
+        next[i, j] = mutation
+
+    elif cell == Cell.Dead and neighbors == 3:
+        next[i, j] = mutation
+
+    elif cell > 0 and (neighbors < 2 or neighbors > 3):
+        next[i, j] = Cell.Dead
+
+    else:
+        next[i, j] = curr[i, j]
+
+@pytest.mark.parametrize('seed', range(200))
+def test_step_matches_old_update_at(seed):
+    rng = np.random.default_rng(seed)
+    world = WorldGrid(23 * 5, 17 * 5, 5)
+    world.curr = rng.integers(0, 6, size=world.size).astype(np.int64)
+
+    # o jogo antigo escrevia as células de spawn em `curr` e `next`, então
+    # `next` já tinha o valor que `update_at` deixava sem tocar
+    expected = world.curr.copy()
+    for (i, j), _ in np.ndenumerate(world.curr):
+        old_update_at(world.curr, expected, i, j)
+
+    world.step()
+    assert np.array_equal(world.next, expected)
+
+def test_step_keeps_masked_cells():
+    world = WorldGrid(50, 50, 5)
+    world.curr[...] = Cell.Dead
+    world.curr[4, 3:6] = Cell.Healthy
+    keep = np.zeros(world.size, dtype=bool)
+    keep[4, 3] = True
+
+    world.step(keep=keep)
+    assert world.next[4, 3] == Cell.Healthy
+    assert world.next[4, 5] == Cell.Dead
+
+def test_edit_priority_holds_across_flushes():
+    world = WorldGrid(200, 200, 10)
+    world.curr[...] = Cell.Dead
+
+    world.set_circular_region(10, 10, Cell.SpawnImmune, 2, Priority.Immune)
+    world.apply_edits()
+    world.set_circular_ring(7, 10, Cell.SpawnInfected, 3, th=1)
+    world.set_cell(11, 10, Cell.Dead, Priority.Snake)
+    world.apply_edits()
+
+    # o anel não passa por cima da região imune, a cobra passa
+    assert world.curr[10, 10] == Cell.SpawnImmune
+    assert world.curr[11, 10] == Cell.Dead
+    assert world.curr[4, 10] == Cell.SpawnInfected
+
+    # no tick seguinte a disputa recomeça
+    world.finish_edits()
+    world.set_cell(10, 10, Cell.SpawnInfected)
+    world.apply_edits()
+    assert world.curr[10, 10] == Cell.SpawnInfected